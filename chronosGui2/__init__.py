@@ -1,3 +1,6 @@
+# Start the startup profiler first, if it's on, so it sees everything else get imported.
+import chronosGui2.startup_profile as startup_profile
+
 # Import classes and methods
 from chronosGui2.animate import MenuToggle
 from chronosGui2.animate import delay
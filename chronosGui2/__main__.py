@@ -21,14 +21,18 @@ import sys, os
 import time
 import logging
 import argparse
+import signal
 
 # QT-specific imports
 from PyQt5 import QtWidgets, QtCore, QtGui
 import chronosGui2.generated.assets_rc
 
 from chronosGui2.stats import report
+from chronosGui2 import metrics
 from chronosGui2.debugger import *; dbg #imported for occasional use debugging, ignore "unused" warning
 import chronosGui2.settings
+import chronosGui2.api as api
+from chronosGui2 import structured_log, startup_profile
 from chronosGui2 import Hardware
 from chronosGui2.main import Window
 
@@ -90,8 +94,12 @@ def main():
 		sys.excepthook = excepthook
 		dbg, brk = pdb.set_trace, pdb.set_trace #convenience debugging
         
+	#Keep a record of what the API was up to, in case we crash.
+	structured_log.installCrashDump()
+	
 	# Instantiate the QApplication with any remaining arguments.
-	app = QtWidgets.QApplication(parsed.args)
+	with startup_profile.span('create QApplication'):
+		app = QtWidgets.QApplication(parsed.args)
 	app.setDoubleClickInterval(500) #400 is default and hard to do with fingers. Also this doesn't work. "The default value on X11 is 400 milliseconds", but how do you change that? Since we only use it one place, we'll just ignore it and debounce our own.
 
 	font = QtGui.QFont("Roboto", 12)
@@ -104,22 +112,37 @@ def main():
 	#eventFilter = GlobalFilter(app, window)
 	#app.installEventFilter(eventFilter)
 
-	app.setStyleSheet("""
-		/* This should set line-height to roughly 120%, as specified in the mockup main2.6d.svg, but it doesn't. (It is not supported by QFont.)*/
-		* {
-			line-height: 35px;
-		}
-		
-		/* Remove the little dotted focus ring. It's too hard to see, but still looks messy now that we've got our own. */
-		*:focus {
-			outline: 2px double blue; /*Debugging, show system focus ring.*/
-			outline: none;
-			outline-offset: 5px; /* This doesn't work. 😑 */
-			/*outline-radius: 5px;*/
-		}
-	""")
-
-	window = Window(app)
+	with startup_profile.span('apply stylesheet'):
+		app.setStyleSheet("""
+			/* This should set line-height to roughly 120%, as specified in the mockup main2.6d.svg, but it doesn't. (It is not supported by QFont.)*/
+			* {
+				line-height: 35px;
+			}
+			
+			/* Remove the little dotted focus ring. It's too hard to see, but still looks messy now that we've got our own. */
+			*:focus {
+				outline: 2px double blue; /*Debugging, show system focus ring.*/
+				outline: none;
+				outline-offset: 5px; /* This doesn't work. 😑 */
+				/*outline-radius: 5px;*/
+			}
+		""")
+
+	with startup_profile.span('create Window'):
+		window = Window(app)
+	
+	if startup_profile.enabled:
+		class FirstPaint(QtCore.QObject):
+			"""Mark the first paint of the first screen in the startup profile, and write the profile out."""
+			def eventFilter(self, screen, event):
+				if event.type() == QtCore.QEvent.Paint:
+					screen.removeEventFilter(self)
+					startup_profile.mark('first paint')
+					QtCore.QTimer.singleShot(0, startup_profile.write) #After the paint's done.
+				return False
+		firstPaint = FirstPaint(app)
+		window._screens[window.currentScreen].installEventFilter(firstPaint)
+	
 	def focusChanged(old, new):
 		if new:
 			window._screens[window.currentScreen].focusRing.focusOn(new)
@@ -144,6 +167,18 @@ def main():
 
 
 	report("start_up_time", {"seconds": time.perf_counter() - chronosGui2.main.perf_start_time})
+	metrics.timing('startup', (time.perf_counter() - chronosGui2.main.perf_start_time)*1000)
+	
+	#Talk to UDisks2 and NetworkManager once the first screen has been drawn. Until then, the last known partitions and connections are used.
+	QtCore.QTimer.singleShot(0, api.startSystemServices)
+	
+	#Dump API call timings and recent API events on request, with `kill -USR1 <pid>`.
+	def dumpApiState(*_):
+		logging.getLogger('Chronos.api').warning(f'Call timings (ms):\n{api.callStats.dump()}')
+		with open(structured_log.CRASH_DUMP_PATH, 'w') as file:
+			structured_log.dump(file)
+		logging.getLogger('Chronos.api').warning(f'Recent events written to {structured_log.CRASH_DUMP_PATH}.')
+	signal.signal(signal.SIGUSR1, dumpApiState)
 
 	sys.exit(app.exec_())
 
@@ -2,31 +2,109 @@
 
 """Interface for the control api d-bus service."""
 
-from typing import Callable, Any, Dict
+from typing import Callable, Any, Dict, List
 import sys, os
-import subprocess
+import json, gzip, atexit
 from time import perf_counter
+from datetime import datetime
 from difflib import get_close_matches
-from ipaddress import IPv4Address, IPv6Address, AddressValueError
-from collections import defaultdict
+from ipaddress import ip_address, IPv4Address, IPv6Address, AddressValueError
+from collections import defaultdict, Counter, deque, OrderedDict
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
-from PyQt5.QtCore import pyqtSlot, QObject
-from PyQt5.QtDBus import QDBusConnection, QDBusInterface, QDBusReply, QDBusPendingCallWatcher, QDBusPendingReply
+from PyQt5.QtCore import pyqtSlot, pyqtSignal, QObject, QThread, QCoreApplication
+from PyQt5.QtDBus import QDBusConnection, QDBusInterface, QDBusMessage, QDBusReply, QDBusPendingCallWatcher, QDBusPendingReply
 
 from chronosGui2.debugger import *; dbg
-from chronosGui2 import delay
+from chronosGui2 import delay, settings, metrics, structured_log, startup_profile
 import logging; log = logging.getLogger('Chronos.api')
+hotLog = structured_log.getLogger('Chronos.api') #For the busy parts of the call and notify paths. See structured_log.
+notifyLog = structured_log.getLogger('Chronos.api.notify')
 
 #Mock out the old API; use production for this one so we can switch over piecemeal.
-USE_MOCK = os.environ.get('USE_CHRONOS_API_MOCK') in ('always', 'gui')
+#'external' talks to the mock services too, but leaves providing them to another process, such as api_replay.py or api_benchmark.py.
+USE_MOCK = os.environ.get('USE_CHRONOS_API_MOCK') in ('always', 'gui', 'external')
 API_INTERCALL_DELAY = 0
 API_SLOW_WARN_MS = 100
 API_TIMEOUT_MS = 5000
+API_MAX_CALLS_IN_FLIGHT = 4 #Independent calls may be pipelined up to this many deep. Set to 1 to run every call strictly one after another, as before.
+API_BATCH_GETS = False #Collect all the get() calls made in one event loop tick into a single D-Bus call.
+API_SYNC_CALL_CHECK = os.environ.get('CHRONOS_API_SYNC_CALLS', '') #Set to 'warn' or 'raise' to find synchronous calls blocking the GUI thread.
+API_CACHE_TTL_MS = { #Keys which the control API doesn't notify us of changes to. They're refreshed in the background after this long.
+	'batteryChargeNormalized': 2000,
+	'batteryChargePercent': 2000,
+	'batteryVoltage': 2000,
+	'ioSourceStatus': 100,
+}
+API_PRIORITY_KEYS = { #Keys loaded before the first screen is built. The rest are loaded in the background, API_DEFERRED_LOAD_BATCH_SIZE at a time.
+	'cameraModel', 'cameraSerial', 'sensorColorPattern', 'state',
+	'resolution', 'framePeriod', 'frameRate', 'cameraMaxFrames', 'recSegments', 'totalFrames',
+	'exposurePeriod', 'exposureMin', 'exposureMax', 'wbTemperature',
+	'batteryChargeNormalized', 'batteryChargePercent', 'batteryVoltage', 'batteryPresent', 'externalPower', 'powerOffWhenMainsLost',
+	'focusPeakingColor', 'focusPeakingLevel', 'zebraLevel', 'videoZoom', 'videoSegments',
+	'sensorHMax', 'sensorHMin', 'sensorHIncrement', 'sensorVMax', 'sensorVMin', 'sensorVIncrement', #Fixed, and needed to lay out the recording settings screen.
+	'ioMapping', 'ioSourceStatus', #Read with apiValues.get() by the triggers screen, which may be built before the rest have loaded.
+}
+API_DEFERRED_LOAD_BATCH_SIZE = 20
+API_DISK_USAGE_TTL_MS = 2000 #Reuse a partition's measured disk usage for this long. Mounting, unmounting, and saving invalidate it early.
+API_CALL_STATS_SAMPLES = 200 #Number of recent calls to keep timings for, per method and per key. See callStats.
+API_SIGNAL_TIMING_BUCKETS_MS = (1, 4, 16, 64, 256) #Upper bounds of the video signal handler run time histogram buckets. The last bucket is everything slower.
+API_NOTIFY_FLUSH_MS = int(os.environ.get('CHRONOS_API_NOTIFY_FLUSH_MS', 0)) #If set, observers hear about notified changes at most once per this many ms, with the latest value of each key. 16 is about once a frame. 0 delivers each notify as it arrives.
 
-if USE_MOCK: #Resource accquisition is initialisation, here, so importing starts the mocks.
+API_RECORD_FILE = os.environ.get('CHRONOS_API_RECORD', '') #Record all D-Bus traffic to this file, for api_replay.py. Gzipped if it ends in .gz.
+
+if USE_MOCK and os.environ.get('USE_CHRONOS_API_MOCK') != 'external': #Resource accquisition is initialisation, here, so importing starts the mocks.
 	log.warn(f"Using API mocks. ($USE_CHRONOS_API_MOCK={os.environ.get('USE_CHRONOS_API_MOCK')})")
 	import control_api_mock, video_api_mock; control_api_mock, video_api_mock
 
+class TrafficRecorder():
+	"""Record D-Bus calls and signals to a file, so api_replay.py can play them back.
+		
+		The file is JSON lines. The first line is a header, and each
+		following line is one call or one signal:
+			{"t": ms, "api": "control", "call": "get", "args": [["state"]], "ms": 3.1, "reply": {"state": "idle"}}
+			{"t": ms, "api": "control", "signal": "notify", "args": [{"state": "recording"}]}
+		t is when the call was sent or the signal received, since recording
+		started. ms is how long the call took to reply. A failed call has
+		an "error" instead of a "reply".
+	"""
+	
+	def __init__(self, path: str):
+		self._start = perf_counter()
+		self._file = (gzip.open if path.endswith('.gz') else open)(path, 'wt')
+		atexit.register(self._file.close)
+		self._write({'version': 1, 'recorded': datetime.now().isoformat()})
+		log.warn(f'Recording D-Bus traffic to {path}. ($CHRONOS_API_RECORD)')
+	
+	def _write(self, entry: dict):
+		self._file.write(json.dumps(entry, separators=(',', ':'), default=repr) + '\n')
+	
+	def call(self, api: str, args: tuple, started: float, finished: float, *, reply=None, error: str = None):
+		entry = {
+			't': round((started - self._start)*1000, 2),
+			'api': api,
+			'call': args[0],
+			'args': list(args[1:]),
+			'ms': round((finished - started)*1000, 2),
+		}
+		if error is None:
+			entry['reply'] = reply
+		else:
+			entry['error'] = error
+		self._write(entry)
+	
+	def signal(self, api: str, name: str, args: list):
+		self._write({
+			't': round((perf_counter() - self._start)*1000, 2),
+			'api': api,
+			'signal': name,
+			'args': list(args),
+		})
+
+recorder = TrafficRecorder(API_RECORD_FILE) if API_RECORD_FILE else None
+
+
 class apiSingleton(type):
 	"""Metaclass used to ensure only one D-Bus API class is instantiated"""
 	def __init__(cls, name, bases, attrs, *kwargs):
@@ -53,7 +131,7 @@ class apiBase():
 		`.then(cb(value))` and `.catch(cb(error))` to get the results
 		of calling the function.
 	"""
-	def __init__(self, service, path, interface="", bus=QDBusConnection.systemBus()):
+	def __init__(self, service, path, interface="", bus=QDBusConnection.systemBus(), *, maxCallsInFlight=API_MAX_CALLS_IN_FLIGHT, batchGets=API_BATCH_GETS):
 		if not QDBusConnection.systemBus().isConnected():
 			log.error("Can not connect to D-Bus. Is D-Bus itself running?")
 			raise Exception("D-Bus Setup Error")
@@ -63,8 +141,15 @@ class apiBase():
 
 		# For Asynchronous call handling.
 		self.enqueuedCalls = []
-		self.callInProgress = False
-		self.activeCall = None
+		self.activeCalls = [] #Calls which have been sent, but which have not been replied to yet.
+		self._queuedSetKeys = Counter() #Number of enqueued sets writing each key. Kept in step with enqueuedCalls.
+		self._activeSetKeys = Counter() #Likewise, for activeCalls.
+		self.maxCallsInFlight = maxCallsInFlight
+		
+		# For batching get() calls.
+		self.batchGets = batchGets
+		self._getBatch = None #The get call other gets are being merged into this tick.
+		self._getBatchTimer = delay(None, 0, self._releaseGetBatch, paused=True)
 		
 		log.info("Connected to D-Bus %s API at %s", self.name, self.iface.path())
 
@@ -90,12 +175,25 @@ class apiBase():
 		"""
 		
 		#Unwrap D-Bus errors from message.
-		log.debug("%s.callSync %s", self.name, tuple(args))
+		hotLog.debug('callSync', api=self.name, method=args[0])
+		
+		if API_SYNC_CALL_CHECK and _onGuiThread():
+			message = f'{self.name}.callSync{tuple(args)} blocks the GUI thread. Use {self.name}.call() instead.'
+			if API_SYNC_CALL_CHECK == 'raise':
+				raise BlockingCallError(message)
+			log.warn(message, stack_info=True)
 		
 		start = perf_counter()
 		msg = QDBusReply(self.iface.call(*args, **kwargs))
 		end = perf_counter()
+		if recorder:
+			if msg.isValid():
+				recorder.call(self.name, args, start, end, reply=msg.value())
+			else:
+				recorder.call(self.name, args, start, end, error=f'{msg.error().name()}: {msg.error().message()}')
+		metrics.timing(f'api.call.{self.name}.{args[0]}', (end-start)*1000)
 		if warnWhenCallIsSlow and (end - start > API_SLOW_WARN_MS / 1000):
+			metrics.count('api.slowCalls')
 			log.warn(f'slow call: {self.name}.callSync{tuple(args)} took {(end-start)*1000:.0f}ms/{API_SLOW_WARN_MS}ms.')
 		
 		if msg.isValid():
@@ -135,26 +233,45 @@ class apiBase():
 		else:
 			raise valueError('bad args')
 
+	@staticmethod
+	def _indexSetKeys(index, call, delta):
+		"""Add (delta=1) or remove (delta=-1) the keys written by call to an index of set keys."""
+		if call._args[0] != 'set':
+			return
+		for key in call._args[1]:
+			index[key] += delta
+			if not index[key]:
+				del index[key]
+	
+	def _isBeingSet(self, key):
+		"""True if a set of key has not been replied to yet."""
+		return key in self._queuedSetKeys or key in self._activeSetKeys
+	
+	def _isEnqueuedForSet(self, key):
+		"""True if a set of key is waiting to be sent."""
+		return key in self._queuedSetKeys
+	
 	def enqueueCall(self, pendingCall, coalesce: bool=True): #pendingCall is CallPromise
 		"""Enqueue callback. Squash and elide calls to set for efficiency."""
 		
 		#Step 1: Will this call actually do anything? Elide it if not.
 		anticipitoryUpdates = False #Emit update signals before sending the update to the API. Results in faster UI updates but poorer framerate.
 		if coalesce and pendingCall._args[0] == 'set':
-			#Elide this call if it would not change known state.
+			#Elide this call if it would not change known state. If another set
+			#of the key is still pending, the known state is about to change, so
+			#we must send this call to put it back again.
 			hasNewInformation = False
 			newItems = pendingCall._args[1].items()
 			for key, value in newItems:
-				if _camState[key] != value:
+				if _camState.differs(key, value) or self._isBeingSet(key):
 					hasNewInformation = True
 					if not anticipitoryUpdates:
 						break
 					#Update known cam state in advance of state transition.
-					log.info(f'Anticipating {key} → {value}.')
-					_camState[key] = value
-					for callback in apiValues._callbacks[key]:
-						callback(value)
+					hotLog.info('anticipate', key=key, value=value)
+					apiValues._applyUpdate(key, value, 'anticipated')
 			if not hasNewInformation:
+				pendingCall._resolve(dict(pendingCall._args[1])) #Nothing to do, so we're done already.
 				return
 		
 		if coalesce and pendingCall._args[0] == 'playback':
@@ -171,25 +288,77 @@ class apiBase():
 				
 			return
 		
-		#Step 2: Is there already a set call pending? (Note that non-set calls act as set barriers; two sets won't get coalesced if a non-set call is between them.)
-		if coalesce and [pendingCall] == self.enqueuedCalls[:1]:
-			self.enqueuedCalls[-1] = pendingCall
-		else:
-			self.enqueuedCalls += [pendingCall]
+		#Step 2: Is there already a set call pending which we can fold this one into?
+		if coalesce and pendingCall._args[0] == 'set':
+			host = self._coalescingHostFor(pendingCall)
+			if host:
+				self._indexSetKeys(self._queuedSetKeys, host, -1)
+				host._absorb(pendingCall)
+				self._indexSetKeys(self._queuedSetKeys, host, +1)
+				return
+		
+		self.enqueuedCalls += [pendingCall]
+		self._indexSetKeys(self._queuedSetKeys, pendingCall, +1)
+	
+	def _coalescingHostFor(self, pendingSet):
+		"""Find the enqueued set which pendingSet can be merged into.
+			
+			Walk back from the end of the queue. Any set which doesn't share
+			keys with pendingSet can be passed over, but isn't merged into,
+			since the two sets may have side-effects which depend on
+			being set separately. The first set which shares keys is merged
+			into, since it would be overwritten by our new values anyway.
+			Anything else, such as a get or a call with unknown
+			side-effects, stops the search, since it has to see the old
+			values.
+			
+			Returns None if there is nothing to merge into.
+		"""
+		pendingKeys = pendingSet.keys()
+		for queuedCall in reversed(self.enqueuedCalls):
+			if queuedCall._args[0] == 'set' and not pendingKeys.isdisjoint(queuedCall.keys()):
+				return queuedCall
+			if pendingSet.conflictsWith(queuedCall):
+				return None
+		return None
+	
+	@property
+	def callInProgress(self):
+		return bool(self.activeCalls)
 	
 	def _startNextCallback(self):
-		"""Check for pending callbacks.
+		"""Start as many pending calls as the in-flight window allows.
+			
+			Calls are started in the order they were enqueued, except
+			that a call may overtake a blocked call ahead of it if the
+			two don't conflict. (See CallPromise.conflictsWith.) So, a
+			slow `status` won't hold up a `get`, but two sets of the same
+			key will always be applied in order.
 			
-			If none are found, simply stop.
+			If nothing can be started, simply stop.
 			
 			Note: Needs to be manually pumped.
 		"""
-		if self.enqueuedCalls:
-			self.callInProgress = True
-			self.enqueuedCalls.pop(0)._startAsyncCall()
-		else:
-			self.callInProgress = False
-
+		blocked = []
+		for pendingCall in self.enqueuedCalls[:]:
+			if len(self.activeCalls) >= self.maxCallsInFlight:
+				break
+			
+			if pendingCall._held or True in [pendingCall.conflictsWith(call) for call in self.activeCalls + blocked]:
+				blocked += [pendingCall]
+				continue
+			
+			self.enqueuedCalls.remove(pendingCall)
+			self._indexSetKeys(self._queuedSetKeys, pendingCall, -1)
+			self.activeCalls += [pendingCall]
+			self._indexSetKeys(self._activeSetKeys, pendingCall, +1)
+			pendingCall._startAsyncCall()
+	
+	def _callFinished(self, finishedCall):
+		"""Retire a call from the in-flight window."""
+		self.activeCalls.remove(finishedCall)
+		self._indexSetKeys(self._activeSetKeys, finishedCall, -1)
+	
 	def call(self, *args):
 		"""Call a camera DBus API. First arg is the function name. Returns a promise.
 		
@@ -199,14 +368,43 @@ class apiBase():
 		"""
 		promise = CallPromise(*args, api=self)
 
-		log.debug(f'enquing {promise}')
+		hotLog.debug('enqueue', call=id(promise), method=args[0], keys=promise.keys())
 		self.enqueueCall(promise)
-		if not self.callInProgress:
-			#Don't start multiple callbacks at once, the most recent one will block.
-			self._startNextCallback()
+		self._startNextCallback()
 		
 		return promise
 
+	def _batchedGet(self, keys):
+		"""Get keys as part of this event loop tick's batched get call.
+			
+			The first get of the tick is held in the queue until the tick
+			is over. Any gets made in the meantime are merged into it, so
+			they all go out as one D-Bus call. Each promise is resolved with
+			just the keys it asked for.
+		"""
+		promise = CallPromise('get', list(keys), api=self)
+		
+		batch = self._getBatch
+		if batch and batch in self.enqueuedCalls and not [ #Don't read ahead of a set enqueued since the batch was started.
+			call for call in self.enqueuedCalls[self.enqueuedCalls.index(batch)+1:]
+			if promise.conflictsWith(call)
+		]:
+			batch._absorb(promise)
+			return promise
+		
+		promise._held = True
+		self._getBatch = promise
+		self.enqueueCall(promise)
+		self._getBatchTimer.start()
+		return promise
+	
+	def _releaseGetBatch(self):
+		"""Send the gets collected during the last event loop tick."""
+		self._getBatch = None
+		for call in self.enqueuedCalls:
+			call._held = False
+		self._startNextCallback()
+	
 	def get(self, keyOrKeys):
 		"""Call a camera DBus API get method.
 		
@@ -216,11 +414,15 @@ class apiBase():
 			
 			Returns value or {key:value, …}, respectively.
 			
+			If batchGets is set, gets made in the same event loop tick
+			are sent together. See _batchedGet.
+			
 			See control's `availableKeys` for a list of valid inputs.
 		"""
 		
-		return self.call(
-			'get', [keyOrKeys] if isinstance(keyOrKeys, str) else keyOrKeys
+		keys = [keyOrKeys] if isinstance(keyOrKeys, str) else keyOrKeys
+		return (
+			self._batchedGet(keys) if self.batchGets else self.call('get', keys)
 		).then(lambda valueList:
 			valueList[keyOrKeys] if isinstance(keyOrKeys, str) else valueList
 		)
@@ -233,7 +435,7 @@ class apiBase():
 				value, if the second form was used.
 		"""
 		
-		log.debug(f'simple set call: {args}')
+		hotLog.debug('set', keys=tuple(args[0]) if len(args) == 1 else args[:1])
 		if len(args) == 1:
 			return self.call('set', *args)
 		elif len(args) == 2:
@@ -247,6 +449,24 @@ class apiBase():
 
 
 
+def _onGuiThread():
+	"""True if we're running on the Qt event loop's thread, once it exists."""
+	app = QCoreApplication.instance()
+	return app is not None and QThread.currentThread() == app.thread()
+
+
+def _asyncSystemCall(service: str, path: str, interface: str, method: str, *args, timeout: int = 1000) -> QDBusPendingCallWatcher:
+	"""Call a method of a system service, such as NetworkManager, without blocking.
+		
+		Unlike QDBusInterface, this doesn't introspect the service first,
+		which blocks until the service is up. Connect to the returned
+		watcher's finished signal to get the reply."""
+	
+	msg = QDBusMessage.createMethodCall(service, path, interface, method)
+	msg.setArguments(list(args))
+	return QDBusPendingCallWatcher(QDBusConnection.systemBus().asyncCall(msg, timeout))
+
+
 class DBusException(Exception):
 	"""Raised when something goes wrong with dbus. Message comes from dbus' msg.error().message()."""
 	pass
@@ -255,6 +475,14 @@ class APIException(Exception):
 	"""Raised when something goes wrong with dbus. Message comes from dbus' msg.error().message()."""
 	pass
 
+class BlockingCallError(Exception):
+	"""Raised when a synchronous call is made on the GUI thread, if $CHRONOS_API_SYNC_CALLS is 'raise'."""
+	pass
+
+class NotLoadedError(Exception):
+	"""Raised when getting the value of a key which is still being loaded in the background. Observe it instead."""
+	pass
+
 class ControlReply():
 	def __init__(self, value=None, errorName=None, message=None):
 		self.value = value
@@ -267,7 +495,147 @@ class ControlReply():
 		else:
 			return self.value
 
-class CallPromise(QObject):
+_keepAlive = set() #Promises which nothing else would hold on to until they settle, such as sleeps and running coroutines.
+
+class CancelledError(Exception):
+	"""Raised into a coroutine, or passed to catch(), when a promise is cancelled."""
+	pass
+
+def _asException(error):
+	"""Convert a QDBusError, as passed to catch(), into something which can be raised."""
+	if isinstance(error, BaseException):
+		return error
+	if error.name() == 'org.freedesktop.DBus.Error.NoReply':
+		return DBusException(f"call timed out ({API_TIMEOUT_MS}ms)")
+	return DBusException("%s: %s" % (error.name(), error.message()))
+
+def _asyncioLoopRunning():
+	"""True if an asyncio event loop, such as qasync's, is driving the current coroutine."""
+	asyncio = sys.modules.get('asyncio') #Don't pay to import asyncio if nobody is using it.
+	return bool(asyncio and getattr(asyncio, '_get_running_loop', lambda: None)())
+
+
+class Promise(QObject):
+	"""A value which will be available later.
+		
+		Use `.then(cb(value))` and `.catch(cb(error))` to get the result,
+		or `await` it from a coroutine started with `spawn()`. Callbacks
+		registered after the promise has settled are called right away.
+		
+		Each then() callback is passed the return value of the previous
+		one, so `get('a').then(f).then(g)` calls g(f(a)).
+	"""
+	def __init__(self):
+		super().__init__()
+		self._thens = []
+		self._catches = []
+		self._settledCallbacks = [] #Internal; called after then/catch, with no arguments.
+		self._done = False
+		self._result = None
+		self._error = None
+	
+	def _resolve(self, value):
+		"""Run the then() chain with the promise's result."""
+		if self._done:
+			return #Already settled, probably cancelled or timed out.
+		self._done = True
+		self._result = value
+		for then in self._thens:
+			self._runThen(then)
+		self._settled()
+	
+	def _reject(self, error):
+		"""Run the catch() chain with the promise's error."""
+		if self._done:
+			return
+		self._done = True
+		self._error = error
+		self._runCatches(self._catches)
+		self._settled()
+	
+	def _runThen(self, then):
+		try:
+			self._result = then(self._result)
+		except Exception as error:
+			if not self._catches:
+				raise error
+			self._error = error
+			self._runCatches(self._catches)
+	
+	def _runCatches(self, catches):
+		error = self._error
+		for catch in catches:
+			try:
+				error = catch(error)
+			except Exception as e:
+				error = e
+	
+	def _settled(self):
+		_keepAlive.discard(self)
+		for callback in self._settledCallbacks:
+			callback()
+	
+	def _whenSettled(self, callback):
+		"""Call callback() once this promise has resolved or rejected."""
+		if self._done:
+			callback()
+		else:
+			self._settledCallbacks += [callback]
+	
+	def _settleLike(self, other):
+		"""Resolve or reject the same way another, settled, promise did."""
+		if other._error is not None:
+			self._reject(other._error)
+		else:
+			self._resolve(other._result)
+	
+	def _isObserved(self):
+		"""True if something will handle this promise's error, so we shouldn't raise it."""
+		return bool(self._catches or self._settledCallbacks)
+	
+	
+	def then(self, callback):
+		assert callable(callback), "then() only accepts a single, callable function."
+		if not self._done:
+			self._thens += [callback]
+		elif self._error is None:
+			self._runThen(callback)
+		return self
+	
+	def catch(self, callback):
+		assert callable(callback), "catch() only accepts a single, callable function."
+		if not self._done:
+			self._catches += [callback]
+		elif self._error is not None:
+			self._runCatches([callback])
+		return self
+	
+	def cancel(self):
+		"""Give up on the promise. It rejects with CancelledError, unless already settled."""
+		self._reject(CancelledError(f'{self} cancelled'))
+	
+	def __await__(self):
+		if not self._done:
+			if _asyncioLoopRunning():
+				import asyncio
+				future = asyncio.get_event_loop().create_future()
+				self._whenSettled(lambda: future.done() or future.set_result(None))
+				yield from future
+			else:
+				yield self #Suspend the coroutine. Its Task will resume it once we've settled.
+		
+		if self._error is not None:
+			raise _asException(self._error)
+		return self._result
+
+
+def _valuesFor(keys, values):
+	"""Pick the values for keys out of a coalesced set call's reply."""
+	if not isinstance(values, dict):
+		return values
+	return {key: values[key] for key in keys if key in values}
+
+class CallPromise(Promise):
 	"""Call a camera DBus API. First arg is the function name. Returns a promise.
 	
 		See http://doc.qt.io/qt-5/qdbusabstractinterface.html#call for details about calling.
@@ -282,10 +650,9 @@ class CallPromise(QObject):
 		
 		self.api = api
 		self._args = args
-		self._thens = []
-		self._catches = []
-		self._done = False
 		self._watcherHolder = None
+		self._riders = [] #Calls which were coalesced into this one. They resolve when this does.
+		self._held = False #Held calls wait in the queue until released.
 		self.performance = {
 			'enqueued': perf_counter(),
 			'started': 0.,
@@ -293,79 +660,135 @@ class CallPromise(QObject):
 			'handled': 0.,
 		}
 	
-	def __eq__(self, other):
-		# If a video call sets the same keys as another
-		# video call, then it is equal to itself and can
-		# be deduplicated as all sets of the same values
-		# have the same side effects. (ie, Slider no go
-		# fast if me no drop redundant call.)
-		#   –DDR 2019-05-14
-		return (
-			'set' == self._args[0] == other._args[0]
-			and self._args[1].keys() == other._args[1].keys()
-		)
-	
 	def __repr__(self):
 		return f'''{self.api.name}.call({', '.join([repr(x) for x in self._args])})'''
-		
+	
+	
+	#Calls which don't change any state, so they can run alongside each other,
+	#but not alongside any set. Any call not named here is assumed to have
+	#unknowable side-effects, and acts as a barrier to reordering.
+	_readOnlyCalls = frozenset({
+		'get', 'status', 'availableKeys', 'availableCalls',
+		'getResolutionTimingLimits', 'testResolution',
+	})
+	
+	def keys(self):
+		"""Return the set of API keys read or written by this call.
+			
+			Returns None if the call could touch anything."""
+		name = self._args[0]
+		if name == 'get':
+			return frozenset(self._args[1])
+		if name == 'set':
+			return frozenset(self._args[1].keys())
+		if name in self._readOnlyCalls:
+			return frozenset()
+		return None
+	
+	def conflictsWith(self, other):
+		"""True if this call must not overlap or overtake the other call.
+			
+			Two calls conflict if either one has unknown side effects, or
+			if one is a set and the other is a read. Setting a key often
+			changes others, such as resolution changing framePeriod, so a
+			set is a barrier for reads of any key. Sets only conflict with
+			each other if they write the same key, and reads never conflict
+			with each other."""
+		ourKeys, theirKeys = self.keys(), other.keys()
+		if ourKeys is None or theirKeys is None:
+			return True
+		if self._args[0] == 'set' and other._args[0] == 'set':
+			return not ourKeys.isdisjoint(theirKeys)
+		return 'set' in (self._args[0], other._args[0])
+	
+	
+	def _absorb(self, other):
+		"""Merge a later set or get call into this one, which has not started yet.
+			
+			For sets, values from the later call overwrite ours, since they
+			would have done so anyway when it ran. For gets, the keys are
+			added to the ones we're already getting.
+			
+			The later call's promise rides along with this call, and is
+			resolved with the values for its keys. (If one of our own keys
+			was overwritten, our promise gets the newer value, since that
+			is the value which actually ended up set.)"""
+		assert self._args[0] == other._args[0] and self._args[0] in ('set', 'get'), "Can only coalesce set or get calls."
+		assert not self.performance['started'], "Can't coalesce into a call which has already been sent."
+		hotLog.debug('coalesce', call=id(other), into=id(self), keys=other.keys())
+		if not self._riders:
+			self._ownKeys = frozenset(self._args[1]) #Remember what we were asked for, so we only report that back.
+			self._args = (self._args[0], type(self._args[1])(self._args[1])) + self._args[2:] #Copy, don't modify the caller's arguments.
+		if self._args[0] == 'set':
+			self._args[1].update(other._args[1])
+		else:
+			self._args[1].extend(key for key in other._args[1] if key not in self._args[1])
+		self._riders += [other]
+	
+	def _resolveRiders(self, reply):
+		"""Resolve the calls coalesced into this one with their part of the reply."""
+		for rider in self._riders:
+			rider.performance['started'] = self.performance['started']
+			rider.performance['finished'] = self.performance['finished']
+			try:
+				if reply.isError():
+					rider._reject(reply.error())
+				else:
+					rider._resolve(_valuesFor(rider._args[1], reply.value()))
+			except Exception:
+				log.exception(f'error resolving {rider} (coalesced into {self})')
 	
 	def _startAsyncCall(self):
-		log.debug(f'starting async call: {self._args[0]}({self._args[1:]})')
+		hotLog.debug('start', call=id(self), method=self._args[0], keys=self.keys())
 		self.performance['started'] = perf_counter()
 		self._watcherHolder = QDBusPendingCallWatcher(
 			self.api.iface.asyncCallWithArgumentList(self._args[0], self._args[1:])
 		)
 		self._watcherHolder.finished.connect(self._asyncCallFinished)
-		self.api.activeCall = self
 		
 	
 	def _asyncCallFinished(self, watcher):
-		log.debug(f'finished async call: {self}')
+		hotLog.debug('finish', call=id(self), method=self._args[0])
 		self.performance['finished'] = perf_counter()
-		self._done = True
 		
 		reply = QDBusPendingReply(watcher)
+		if recorder:
+			if reply.isError():
+				recorder.call(self.api.name, self._args, self.performance['started'], self.performance['finished'], error=f'{reply.error().name()}: {reply.error().message()}')
+			else:
+				recorder.call(self.api.name, self._args, self.performance['started'], self.performance['finished'], reply=reply.value())
 		try:
 			if reply.isError():
-				if self._catches:
-					error = reply.error()
-					for catch in self._catches:
-						try:
-							error = catch(error)
-						except Exception as e:
-							error = e
-				else:
+				wasObserved = self._done or self._isObserved()
+				self._reject(reply.error())
+				if not wasObserved:
 					#This won't do much, but (I'm assuming) most calls simply won't ever fail.
 					if reply.error().name() == 'org.freedesktop.DBus.Error.NoReply':
 						raise DBusException(f"{self} timed out ({API_TIMEOUT_MS}ms)")
 					else:
 						raise DBusException("%s: %s" % (reply.error().name(), reply.error().message()))
+			elif self._riders:
+				self._resolve(_valuesFor(self._ownKeys, reply.value()))
 			else:
-				value = reply.value()
-				for then in self._thens:
-					try:
-						value = then(value)
-					except Exception as error:
-						if self._catches:
-							for catch in self._catches:
-								try:
-									error = catch(error)
-								except Exception as e:
-									error = e
-						else:
-							raise e
+				self._resolve(reply.value())
 		except Exception as e:
 			raise e
 		finally:
+			self._resolveRiders(reply)
+			
 			#Wait a little while before starting on the next callback.
 			#This makes the UI run much smoother, and usually the lag
 			#is covered by the UI updating another few times anyway.
 			#Note that because each call still lags a little, this
 			#causes a few dropped frames every time the API is called.
+			self.api._callFinished(self)
 			delay(self, API_INTERCALL_DELAY, self.api._startNextCallback)
 			
 			self.performance['handled'] = perf_counter()
+			callStats.record(self)
+			metrics.timing(f'api.call.{self.api.name}.{self._args[0]}', (self.performance['finished'] - self.performance['started'])*1000)
 			if self.performance['finished'] - self.performance['started'] > API_SLOW_WARN_MS / 1000:
+				metrics.count('api.slowCalls')
 				log.warn(
 					f'''slow call: {self} took {
 						(self.performance['finished'] - self.performance['started'])*1000
@@ -374,17 +797,190 @@ class CallPromise(QObject):
 					:0.0f}ms.)'''
 				)
 	
-	def then(self, callback):
-		assert callable(callback), "then() only accepts a single, callable function."
-		assert not self._done, "Can't register new then() callback, call has already been resolved."
-		self._thens += [callback]
-		return self
+	def cancel(self):
+		"""Give up on the call. If it hasn't been sent yet, it never will be."""
+		if self in self.api.enqueuedCalls and not self._riders:
+			self.api.enqueuedCalls.remove(self)
+			self.api._indexSetKeys(self.api._queuedSetKeys, self, -1)
+		super().cancel()
+
+
+class CallStats():
+	"""Rolling timings of recent D-Bus calls, to find out where the time goes.
+		
+		Each call is timed in three phases, in ms:
+			queue: Waiting to be sent, behind other calls.
+			wire: Waiting for the reply. Time spent in D-Bus and the daemon.
+			handler: Running our own .then() and .catch() callbacks.
+		
+		Timings are kept per method, such as 'control.status', and for
+		gets and sets per key, such as 'set exposurePeriod'. Use the
+		debug overlay on the main screen, or send the gui SIGUSR1, to
+		see them."""
 	
-	def catch(self, callback):
-		assert callable(callback), "catch() only accepts a single, callable function."
-		assert not self._done, "Can't register new catch() callback, call has already been resolved."
-		self._catches += [callback]
-		return self
+	phases = ('queue', 'wire', 'handler')
+	
+	def __init__(self, samples: int):
+		self._timings = defaultdict(lambda: deque(maxlen=samples)) #name: [(queue, wire, handler), …]
+	
+	def record(self, call: CallPromise):
+		perf = call.performance
+		timing = (
+			(perf['started'] - perf['enqueued'])*1000,
+			(perf['finished'] - perf['started'])*1000,
+			(perf['handled'] - perf['finished'])*1000,
+		)
+		method = call._args[0]
+		self._timings[f'{call.api.name}.{method}'].append(timing)
+		if method in ('get', 'set') and isinstance(call._args[1], (list, dict)):
+			for key in call._args[1]:
+				self._timings[f'{method} {key}'].append(timing)
+	
+	def reset(self):
+		self._timings.clear()
+	
+	def percentiles(self, percentiles=(50, 90, 99)) -> Dict[str, Dict[str, Dict[int, float]]]:
+		"""Return {name: {phase: {percentile: ms}}} for each method and key seen."""
+		stats = {}
+		for name, timings in self._timings.items():
+			stats[name] = {}
+			for phase, samples in zip(self.phases, zip(*timings)):
+				samples = sorted(samples)
+				stats[name][phase] = {
+					percentile: samples[min(len(samples)-1, len(samples)*percentile//100)]
+					for percentile in percentiles
+				}
+		return stats
+	
+	def dump(self, limit: int = None) -> str:
+		"""Format the 50th/90th/99th percentile timings as a table, slowest first by total p90."""
+		stats = self.percentiles()
+		names = sorted(stats, key=lambda name: -sum(stats[name][phase][90] for phase in self.phases))[:limit]
+		width = max([len(name) for name in names] + [4])
+		return '\n'.join(
+			[f"{'call':<{width}} {'n':>4}  " + '  '.join(f'{phase+" p50/p90/p99":>19}' for phase in self.phases)] + [
+				f"{name:<{width}} {len(self._timings[name]):>4}  " + '  '.join(
+					f"{'/'.join(f'{stats[name][phase][p]:0.0f}' for p in (50, 90, 99)):>19}"
+					for phase in self.phases )
+				for name in names
+			]
+		)
+
+callStats = CallStats(API_CALL_STATS_SAMPLES)
+
+
+class Task(Promise):
+	"""Run a coroutine on the Qt event loop. Use `spawn()` to create one.
+		
+		The coroutine runs until it awaits a promise, such as a call to
+		`api.control().get(…)`, and is resumed once that promise settles.
+		The task resolves with the coroutine's return value.
+	"""
+	def __init__(self, coroutine):
+		super().__init__()
+		self._coroutine = coroutine
+		self._awaiting = None
+		_keepAlive.add(self)
+		self._step()
+	
+	def __repr__(self):
+		return f'Task({self._coroutine})'
+	
+	def _step(self, error=None):
+		"""Run the coroutine until it awaits something else, or finishes."""
+		self._awaiting = None
+		try:
+			awaited = self._coroutine.throw(error) if error else self._coroutine.send(None)
+		except StopIteration as stop:
+			self._resolve(stop.value)
+		except Exception as e:
+			wasObserved = self._isObserved()
+			self._reject(e)
+			if not wasObserved and not isinstance(e, CancelledError):
+				raise e
+		else:
+			if not isinstance(awaited, Promise):
+				return self._step(TypeError(f'{self} can only await promises, not {awaited!r}. (Was this asyncio code? Run it with qasync instead.)'))
+			self._awaiting = awaited
+			awaited._whenSettled(lambda: awaited is self._awaiting and self._step())
+	
+	def cancel(self):
+		"""Stop the coroutine, by raising CancelledError where it's awaiting."""
+		if not self._done:
+			self._step(CancelledError(f'{self} cancelled'))
+
+
+def spawn(coroutine) -> Task:
+	"""Run a coroutine on the Qt event loop, returning a promise for its result.
+		
+		Example:
+			async def updateLabels():
+				charge, voltage = await api.gather(
+					api.control().get('batteryChargeNormalized'),
+					api.control().get('batteryVoltage') )
+				…
+			api.spawn(updateLabels())
+	"""
+	return Task(coroutine)
+
+
+def sleep(ms: int) -> Promise:
+	"""Return a promise which resolves after ms milliseconds."""
+	promise = Promise()
+	_keepAlive.add(promise)
+	delay(promise, ms, lambda: promise._resolve(None))
+	return promise
+
+
+def gather(*promises) -> Promise:
+	"""Return a promise for a list of the results of all the promises.
+		
+		Rejects with the first error, if any of the promises reject."""
+	combined = Promise()
+	results = [None] * len(promises)
+	remaining = len(promises)
+	
+	def settled(index, promise):
+		nonlocal remaining
+		if promise._error is not None:
+			return combined._reject(promise._error)
+		results[index] = promise._result
+		remaining -= 1
+		if not remaining:
+			combined._resolve(results)
+	
+	for index, promise in enumerate(promises):
+		promise._whenSettled(partial(settled, index, promise))
+	if not promises:
+		combined._resolve(results)
+	return combined
+
+
+def race(*promises) -> Promise:
+	"""Return a promise which settles the same way as the first of the promises to do so."""
+	first = Promise()
+	for promise in promises:
+		promise._whenSettled(partial(first._settleLike, promise))
+	return first
+
+
+def timeout(promise: Promise, ms: int) -> Promise:
+	"""Return a promise which rejects with TimeoutError if promise hasn't settled within ms milliseconds.
+		
+		If the time runs out, promise is cancelled."""
+	limited = Promise()
+	_keepAlive.add(limited)
+	
+	def expire():
+		limited._reject(TimeoutError(f'{promise} did not finish within {ms}ms.'))
+		promise.cancel()
+	timer = delay(limited, ms, expire)
+	
+	def settled():
+		timer.stop()
+		limited._settleLike(promise)
+	promise._whenSettled(settled)
+	return limited
 
 
 class video(apiBase, metaclass=apiSingleton):
@@ -441,30 +1037,140 @@ class control(apiBase, metaclass=apiSingleton):
 		)
 
 
+class StateCache():
+	"""The last known values of the control API's keys.
+		
+		Along with each value, we record a version number which counts
+		how many times the key has been updated, when it was last updated,
+		and where the update came from:
+			- 'load': The initial get of all keys.
+			- 'notify': A notify signal from the control API.
+			- 'poll': A background refresh, for keys which aren't notified.
+			- 'anticipated': A set we've sent, but which hasn't been confirmed.
+		
+		Keys may have a TTL, in ms, after which they are considered stale.
+		Keys without a TTL are kept up to date by notify, and never go stale.
+		
+		Keys may also be known to exist, but not be loaded yet. Iterating
+		over the cache includes them, but reading them raises KeyError.
+	"""
+	
+	def __init__(self, values: Dict[str, Any], ttls: Dict[str, int] = {}, *, unloaded=()):
+		now = perf_counter()
+		self._values = dict(values)
+		self._unloaded = set(unloaded) - set(values)
+		self._versions = {key: 0 for key in values}
+		self._updated = {key: now for key in values}
+		self._sources = {key: 'load' for key in values}
+		self._ttls = {key: ttl for key, ttl in ttls.items() if key in values or key in self._unloaded}
+	
+	def __getitem__(self, key):
+		return self._values[key]
+	
+	def __contains__(self, key):
+		return key in self._values or key in self._unloaded
+	
+	def __iter__(self):
+		yield from self._values
+		yield from self._unloaded
+	
+	def __len__(self):
+		return len(self._values) + len(self._unloaded)
+	
+	def __repr__(self):
+		return f'{type(self).__name__}({self._values})'
+	
+	def keys(self):
+		return self._values.keys()
+	
+	def items(self):
+		return self._values.items()
+	
+	def isLoaded(self, key: str) -> bool:
+		return key in self._values
+	
+	def unloaded(self):
+		"""Return the keys which are known to exist, but which haven't been loaded yet."""
+		return set(self._unloaded)
+	
+	def differs(self, key: str, value: Any) -> bool:
+		"""True if value is news to us, because we don't have it yet or it's different."""
+		return key not in self._values or self._values[key] != value
+	
+	def record(self, key: str, value: Any, source: str):
+		"""Note down a new value for key."""
+		self._unloaded.discard(key)
+		if key not in self._values:
+			self._versions[key] = -1
+		self._values[key] = value
+		self._versions[key] += 1
+		self._updated[key] = perf_counter()
+		self._sources[key] = source
+	
+	def touch(self, key: str, source: str):
+		"""Note that key is still current, without changing its value."""
+		self._updated[key] = perf_counter()
+		self._sources[key] = source
+	
+	def version(self, key: str) -> int:
+		return self._versions[key]
+	
+	def source(self, key: str) -> str:
+		return self._sources[key]
+	
+	def age(self, key: str) -> float:
+		"""Seconds since key was last updated."""
+		return perf_counter() - self._updated[key]
+	
+	def ttl(self, key: str) -> int:
+		"""ms key stays fresh for, or None if it's kept up to date by notify."""
+		return self._ttls.get(key)
+	
+	def setTTL(self, key: str, ttl: int):
+		"""Set how long, in ms, key stays fresh for. None disables expiry."""
+		if ttl is None:
+			self._ttls.pop(key, None)
+		else:
+			self._ttls[key] = ttl
+	
+	def isStale(self, key: str) -> bool:
+		ttl = self._ttls.get(key)
+		return ttl is not None and key in self._values and self.age(key)*1000 >= ttl
+
+
 # State cache for observe(), so it doesn't have to query the status of a variable on each subscription.
 # Since this often crashes during development, the following line can be run to try getting each variable independently.
 #     for key in [k for k in control.callSync('availableKeys') if k not in {'dateTime', 'externalStorage'}]: print('getting', key); control.callSync('get', [key])
 __badKeys = {} #set of blacklisted keys - useful for when one is unretrievable during development.
-__controlAPI = control()
+#Only the keys needed to bring up the main screen are loaded here. The rest are
+#loaded in the background once the event loop starts; see _loadDeferredKeys.
+with startup_profile.span('connect control api', 'dbus'):
+	__controlAPI = control()
 if __controlAPI.iface.isValid():
-	_camState = __controlAPI.callSync('get', [
-		key
-		for key in __controlAPI.callSync('availableKeys')
-		if key not in __badKeys
-	], warnWhenCallIsSlow=False)
-	if(not _camState):
+	with startup_profile.span('get availableKeys', 'dbus'):
+		__availableKeys = [
+			key
+			for key in __controlAPI.callSync('availableKeys')
+			if key not in __badKeys
+		]
+	with startup_profile.span('get priority keys', 'dbus'):
+		__initialState = __controlAPI.callSync('get', [
+			key for key in __availableKeys if key in API_PRIORITY_KEYS
+		], warnWhenCallIsSlow=False)
+	if(not __initialState):
 		raise Exception("Cache failed to populate. This indicates the get call is not working.")
-	_camState['error'] = '' #Last error is reported inline sometimes.
+	__initialState['error'] = '' #Last error is reported inline sometimes.
 	
-	if 'videoSegments' not in _camState:
+	if 'videoSegments' not in __availableKeys:
 		log.warn('videoSegments not found in availableKeys (pychronos/issues/31)')
-		_camState['videoSegments'] = []
-	if 'videoZoom' not in _camState:
+		__initialState['videoSegments'] = []
+	if 'videoZoom' not in __availableKeys:
 		log.warn('videoZoom not found in availableKeys (pychronos/issues/52)')
-		_camState['videoZoom'] = 1
+		__initialState['videoZoom'] = 1
 else:
-	_camState = {}
-_camStateAge = {k:0 for k,v in _camState.items()}
+	__availableKeys = []
+	__initialState = {}
+_camState = StateCache(__initialState, API_CACHE_TTL_MS, unloaded=__availableKeys)
 
 class APIValues(QObject):
 	"""Wrapper class for subscribing to API values in the chronos API."""
@@ -481,6 +1187,15 @@ class APIValues(QObject):
 		self._callbacks = {value: [] for value in _camState}
 		self._callbacks['all'] = [] #meta, watch everything
 		
+		self._refreshing = set() #Keys with a background refresh in flight.
+		self._unloadable = set() #Keys which failed to load in the background. They stay unloaded.
+		self._futureOnly = defaultdict(list) #key: callbacks from observe_future_only(), added before the key was loaded, which don't want the load.
+		self._refreshTimers = {} #Keys with a TTL and observers are refreshed on a timer.
+		
+		#Notified values waiting for the next flush, when damping notify storms. In order of first change.
+		self._undelivered = OrderedDict()
+		self._flushTimer = delay(self, API_NOTIFY_FLUSH_MS, self._flush, paused=True)
+		
 		QDBusConnection.systemBus().connect(
 			f"ca.krontech.chronos.{'control_mock' if USE_MOCK else 'control'}", 
 			f"/ca/krontech/chronos/{'control_mock' if USE_MOCK else 'control'}",
@@ -494,39 +1209,143 @@ class APIValues(QObject):
 		assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
 		assert key in self._callbacks, f"Unknown value, '{key}', to observe.\n\nAvailable keys are: \n{chr(10).join(self._callbacks.keys())}\n\nDid you mean to observe '{(get_close_matches(key, self._callbacks.keys(), n=1) or ['???'])[0]}' instead of '{key}'?\n"
 		self._callbacks[key].append(callback)
+		
+		#Keys which aren't notified must be polled, so the observer hears about changes.
+		if _camState.ttl(key) is not None and key not in self._refreshTimers:
+			self._refreshTimers[key] = timer = delay(self, _camState.ttl(key), lambda: self._refresh(key))
+			timer.setSingleShot(False)
 	
 	def unobserve(self, key, callback):
 		"""Stop a function from getting called when a value is updated."""
 		assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
 		self._callbacks[key].remove(callback)
-	
-	def __newValueIsEnqueued(self, key):
-		return True in [
-			key in call._args[1]
-			for call in control().enqueuedCalls
-			if call._args[0] == 'set'
-		]
+		if callback in self._futureOnly.get(key, ()):
+			self._futureOnly[key].remove(callback)
+		
+		if not self._callbacks[key] and key in self._refreshTimers:
+			self._refreshTimers.pop(key).stop()
 	
 	@pyqtSlot('QDBusMessage')
 	def __newKeyValue(self, msg):
 		"""Update _camState and invoke any  registered observers."""
-		newItems = msg.arguments()[0].items()
-		log.info(f'Received new information. {msg.arguments()[0] if len(str(msg.arguments()[0])) <= 45 else chr(10)+prettyFormat(msg.arguments()[0])}')
-		for key, value in newItems:
-			if _camState[key] != value and not self.__newValueIsEnqueued(key):
-				_camState[key] = value
-				_camStateAge[key] += 1
-				for callback in self._callbacks[key]:
-					callback(value)
-				for callback in self._callbacks['all']:
-					callback(key, value)
+		newValues = msg.arguments()[0]
+		recorder and recorder.signal('control', 'notify', msg.arguments())
+		notifyLog.debug('notify', keys=tuple(newValues))
+		api = control()
+		for key, value in newValues.items():
+			if not _camState.differs(key, value) or api._isEnqueuedForSet(key):
+				notifyLog.debug('stale', key=key)
+			elif self._flushTimer.interval():
+				_camState.record(key, value, 'notify')
+				self._undelivered[key] = value
+				self._flushTimer.isActive() or self._flushTimer.start()
 			else:
-				log.info(f'Ignoring {key} → {value}, stale.')
+				self._applyUpdate(key, value, 'notify')
+	
+	def _flush(self):
+		"""Invoke observers for the values notified since the last flush.
+			
+			Only the most recent value of each key is delivered, so a key
+			which changed many times since the last flush is only updated
+			once. Keys are delivered in the order they first changed in."""
+		undelivered, self._undelivered = self._undelivered, OrderedDict()
+		for key, value in undelivered.items():
+			self._invokeObservers(key, value)
+	
+	def _applyUpdate(self, key, value, source):
+		"""Record a new value for key, and invoke any registered observers."""
+		_camState.record(key, value, source)
+		self._undelivered.pop(key, None) #Superseded, don't deliver the old value later.
+		futureOnly = self._futureOnly.pop(key, ())
+		self._invokeObservers(key, value, skip=futureOnly if source == 'load' else ())
+	
+	def _invokeObservers(self, key, value, skip=()):
+		for callback in self._callbacks[key]:
+			if callback not in skip:
+				callback(value)
+		for callback in self._callbacks['all']:
+			callback(key, value)
+	
+	def _refresh(self, key):
+		"""Fetch a fresh value for a key which isn't notified, in the background."""
+		if key in self._refreshing:
+			return
+		self._refreshing.add(key)
+		
+		def refreshed(value):
+			self._refreshing.discard(key)
+			if _camState.differs(key, value) and not control()._isEnqueuedForSet(key):
+				self._applyUpdate(key, value, 'poll')
+			else:
+				_camState.touch(key, 'poll')
+		def failed(error):
+			self._refreshing.discard(key)
+			log.warn(f'Could not refresh {key}: {error}')
+		control().get(key).then(refreshed).catch(failed)
+	
+	def _loadDeferredKeys(self):
+		"""Load the keys which weren't needed at startup, a batch at a time.
+			
+			Observers of a key which hasn't arrived yet are called when it
+			does, in place of the usual call when they start observing.
+			Keys which fail to load are logged and left unloaded, so their
+			observers are never called with a made-up value."""
+		batch = sorted(_camState.unloaded() - self._unloadable)[:API_DEFERRED_LOAD_BATCH_SIZE]
+		if not batch:
+			log.debug('All keys loaded.')
+			startup_profile.complete('load deferred keys', 'dbus', self._deferredLoadStarted)
+			return
+		batchStarted = perf_counter()
+		
+		def apply(values):
+			for key, value in values.items():
+				if not _camState.isLoaded(key): #Could have been notified or fetched already.
+					self._applyUpdate(key, value, 'load')
+		
+		def loaded(values):
+			apply(values)
+			startup_profile.complete(f'load {len(batch)} keys', 'dbus', batchStarted)
+			self._loadDeferredKeys()
+		
+		def failed(error):
+			#Something in this batch isn't retrievable. Load the keys one at a time, so we only lose the broken one.
+			log.error(f'Could not load {batch}: {error}')
+			remaining = [len(batch)]
+			def done(key, values=None, error=None):
+				if error:
+					log.error(f'Could not load {key}, leaving it unloaded: {error}')
+					self._unloadable.add(key)
+				else:
+					apply(values)
+				remaining[0] -= 1
+				if not remaining[0]:
+					self._loadDeferredKeys()
+			for key in batch:
+				(control().call('get', [key])
+					.then(partial(done, key))
+					.catch(lambda error, key=key: done(key, error=error)) )
+		
+		control().call('get', batch).then(loaded).catch(failed)
 	
 	def get(self, key):
+		"""Return the last known value of key.
+			
+			If the key has gone stale, it's refreshed in the background.
+			Observers are notified if the refreshed value is different.
+			
+			Raises NotLoadedError if the key hasn't been loaded yet. Only
+			API_PRIORITY_KEYS are loaded before the first screen is built,
+			so use observe() for the rest, which calls back once they are."""
+		if not _camState.isLoaded(key):
+			raise NotLoadedError(f"'{key}' hasn't been loaded yet. Use api.observe('{key}', callback) instead, which is called once it is, or add it to API_PRIORITY_KEYS.")
+		if _camState.isStale(key):
+			self._refresh(key)
 		return _camState[key]
 
-apiValues = APIValues()
+with startup_profile.span('connect control api notify', 'dbus'):
+	apiValues = APIValues()
+apiValues._deferredLoadStarted = perf_counter()
+apiValues._loadDeferredKeys()
 del APIValues
 
 
@@ -535,6 +1354,7 @@ def observe(name: str, callback: Callable[[Any], None]) -> None:
 	
 		Args:
 			name: ID of the state variable. "exposure", "focusPeakingColor", etc.
+				May also be a value made with `computed()`.
 			callback: Function called when the state updates and upon subscription.
 				Called with one parameter, the new value. Called when registered
 				and when the value updates.
@@ -553,28 +1373,193 @@ def observe(name: str, callback: Callable[[Any], None]) -> None:
 		In addition, this means we only have to query the initial state once,
 		retrieving a blob of all the data available, rather than retrieving each
 		key one syscall at a time as we instantiate each Qt control.
+		
+		Keys not in API_PRIORITY_KEYS are loaded after startup. If name is one
+		of them and hasn't arrived yet, callback is called when it does.
 	"""
 	
 	assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
+	if isinstance(name, Computed):
+		name.observe(callback)
+		return
 	apiValues.observe(name, callback)
-	callback(apiValues.get(name))
+	if _camState.isLoaded(name): #Otherwise, we'll be called when it's loaded.
+		callback(apiValues.get(name))
 
 
 def observe_future_only(name: str, callback: Callable[[Any], None]) -> None:
 	"""Like `observe`, but without the initial callback when observing.
 	
-		Useful when `observe`ing a derived value, which observe can't deal with yet.
+		Prefer `observe_all` or `observe`ing a `computed()` value over
+		using this to hand-roll one out of several keys.
 	"""
 	
 	assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
 	apiValues.observe(name, callback)
+	if not _camState.isLoaded(name): #Loading it isn't a change.
+		apiValues._futureOnly[name].append(callback)
 
 
-unobserve = apiValues.unobserve
+def observe_all(names: List[str], callback: Callable[..., None]) -> None:
+	"""Observe several state values at once.
+	
+		callback is called with the value of each key, in order, once
+		they have all been loaded, and then whenever any of them changes.
+		Several keys changing at once, as they do when the resolution is
+		set, results in one call. Use `computed()` instead to derive a
+		single value from the keys.
+	"""
+	
+	assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
+	def update():
+		if all(_camState.isLoaded(name) for name in names):
+			callback(*[apiValues.get(name) for name in names])
+	updateTimer = delay(None, 0, update, paused=True) #Wait for the other keys in an update to come in.
+	for name in names:
+		apiValues.observe(name, lambda _: updateTimer.isActive() or updateTimer.start())
+	update()
+
 
+def unobserve(name: str, callback: Callable[[Any], None]) -> None:
+	"""Stop calling callback when the value of name changes."""
+	if isinstance(name, Computed):
+		name.unobserve(callback)
+	else:
+		apiValues.unobserve(name, callback)
+
+
+class Computed(QObject):
+	"""A value derived from some API keys. Use `computed()` to create one.
+		
+		The value is only recalculated when one of the keys it's derived
+		from has changed, and observers are only called when the value
+		itself changes. Several keys changing at once, as they do when
+		the resolution is set, results in one recalculation."""
+	
+	_nothing = object() #Nothing has been delivered to the observers yet.
+	
+	def __init__(self, keys, fn):
+		super().__init__()
+		for key in keys:
+			assert key in apiValues._callbacks, f"Unknown value, '{key}', to compute from."
+		self._keys = tuple(keys)
+		self._fn = fn
+		self._versions = None #Of the keys, when _value was calculated.
+		self._value = None
+		self._delivered = self._nothing
+		self._callbacks = []
+		self._recheckTimer = delay(self, 0, self._recheck, paused=True) #Wait for the other keys in an update to come in.
+	
+	def __repr__(self):
+		return f'computed({list(self._keys)}, {self._fn})'
+	
+	@property
+	def value(self):
+		"""The current value. Raises NotLoadedError if a key hasn't been loaded yet."""
+		values = [apiValues.get(key) for key in self._keys]
+		versions = tuple(_camState.version(key) for key in self._keys)
+		if versions != self._versions:
+			self._value = self._fn(*values)
+			self._versions = versions
+		return self._value
+	
+	def observe(self, callback):
+		"""Call callback with the value now, and whenever it changes.
+			
+			If a key isn't loaded yet, callback is first called when it is."""
+		assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
+		if not self._callbacks:
+			for key in self._keys:
+				apiValues.observe(key, self._inputChanged)
+		
+		if self._recheckTimer.isActive(): #Catch the other observers up first, so we can start everyone from the same value.
+			self._recheckTimer.stop()
+			self._recheck()
+		self._callbacks.append(callback)
+		if self._loaded():
+			self._delivered = self.value
+			callback(self._delivered)
+	
+	def unobserve(self, callback):
+		assert callable(callback), f"Callback is not callable. (Expected function, got {callback}.)"
+		self._callbacks.remove(callback)
+		if not self._callbacks:
+			for key in self._keys:
+				apiValues.unobserve(key, self._inputChanged)
+			self._recheckTimer.stop()
+			self._delivered = self._nothing
+	
+	def _loaded(self):
+		return all(_camState.isLoaded(key) for key in self._keys)
+	
+	def _inputChanged(self, _):
+		self._recheckTimer.isActive() or self._recheckTimer.start()
+	
+	def _recheck(self):
+		"""Call the observers if the value has changed since they were last called."""
+		if not self._loaded():
+			return
+		value = self.value
+		if self._delivered is not self._nothing and value == self._delivered:
+			return
+		self._delivered = value
+		for callback in self._callbacks[:]:
+			callback(value)
+
+
+def computed(keys: List[str], fn: Callable[..., Any]) -> Computed:
+	"""Derive a value from some API keys.
+		
+		fn is called with the value of each key, in order, and returns
+		the derived value. The result can be passed to `observe` like a
+		key name, or read via `.value`. For example:
+		
+			shutterAngle = api.computed(['exposurePeriod', 'framePeriod'],
+				lambda exposure, frame: exposure / frame * 360 )
+			api.observe(shutterAngle, updateShutterAngleLabel)
+	"""
+	return Computed(keys, fn)
+
+
+
+class SignalPayload(dict):
+	"""The decoded payload of a video signal, such as `{'filesave': True, …}`.
+		
+		Decoded once per signal and shared by all the handlers, so it
+		can't be modified. Keys can also be read as attributes, so
+		`payload['filesave']` is `payload.filesave`."""
+	
+	__slots__ = ('signal',)
+	
+	def __init__(self, signal: str, data: Dict[str, Any]):
+		super().__init__({
+			str(key): value.value() if hasattr(value, 'value') else value #Unwrap any QVariants we were handed.
+			for key, value in (data or {}).items()
+		})
+		self.signal = signal
+	
+	def __getattr__(self, name):
+		try:
+			return self[name]
+		except KeyError:
+			raise AttributeError(f"{self.signal} payload has no '{name}'.") from None
+	
+	def __readOnly(self, *args, **kwargs):
+		raise TypeError(f"{self.signal} payload is shared between handlers, and can't be changed. Copy it with dict() first.")
+	__setitem__ = __delitem__ = update = pop = popitem = clear = setdefault = __readOnly
 
 
 class Signal(QObject):
+	"""Call handlers when the video API emits sof, eof, or segment.
+		
+		Handlers are called in the order they were added, with the
+		signal's SignalPayload. Handlers added with `deferred=True` are
+		called once the event queue is empty, after everything else, so
+		they don't hold up the handlers which need to run promptly.
+		
+		The run time of each handler is kept in a histogram, which can be
+		inspected with `handlerTimings()`."""
+	
 	def __init__(self):
 		super().__init__()
 		
@@ -583,6 +1568,11 @@ class Signal(QObject):
 			'eof': [],
 			'segment': [],
 		}
+		self._deferredObservers = {signal_: [] for signal_ in self._signalObservers}
+		self._deferredPayloads = [] #Signals received, waiting to be handled by the deferred handlers.
+		self._deferredTimer = delay(self, 0, self.__invokeDeferredCallbacks, paused=True)
+		
+		self._timings = {} #(signal, handler name): {'count', 'total', 'max', 'buckets'}, times in ms
 		
 		
 		#The .connect call freezes if we don't do this, or if we do this twice.
@@ -604,32 +1594,89 @@ class Signal(QObject):
 	#Sort of a reverse trampoline, needed because callbacks must be decorated.
 	@pyqtSlot('QDBusMessage')
 	def __sof(self, msg):
-		log.debug(f'''video signal: sof ({len(self._signalObservers['sof'])} handlers)''')
 		self.__invokeCallbacks('sof', *msg.arguments())
 	@pyqtSlot('QDBusMessage')
 	def __eof(self, msg):
-		log.debug(f'''video signal: eof ({len(self._signalObservers['eof'])} handlers)''')
 		self.__invokeCallbacks('eof', *msg.arguments())
 	@pyqtSlot('QDBusMessage')
 	def __segment(self, msg):
-		log.debug(f'''video signal: segment ({len(self._signalObservers['segment'])} handlers)''')
 		self.__invokeCallbacks('segment', *msg.arguments())
 	
 	def __invokeCallbacks(self, signal, data):
-		for callback in self._signalObservers[signal]:
-			callback(data)
+		log.debug('video signal: %s (%i handlers, %i deferred)', signal, len(self._signalObservers[signal]), len(self._deferredObservers[signal]))
+		recorder and recorder.signal('video', signal, [data])
+		payload = SignalPayload(signal, data)
+		for callback in self._signalObservers[signal][:]:
+			self.__invokeCallback(callback, payload)
+		
+		if self._deferredObservers[signal]:
+			self._deferredPayloads += [payload]
+			self._deferredTimer.isActive() or self._deferredTimer.start()
 	
+	def __invokeDeferredCallbacks(self):
+		payloads, self._deferredPayloads = self._deferredPayloads, []
+		for payload in payloads:
+			for callback in self._deferredObservers[payload.signal][:]:
+				self.__invokeCallback(callback, payload)
 	
-	def observe(self, signal: str, handler: Callable[[Any], None]) -> None:
-		"""Add a function to get called when a D-BUS signal is emitted."""
+	def __invokeCallback(self, callback, payload):
+		"""Call a handler, timing it. One handler failing doesn't stop the others from being called."""
+		start = perf_counter()
+		try:
+			callback(payload)
+		except Exception:
+			log.exception(f'error handling video signal {payload.signal} with {callback}')
+		elapsedMs = (perf_counter() - start)*1000
+		
+		timing = self._timings.setdefault(
+			(payload.signal, getattr(callback, '__qualname__', repr(callback))),
+			{'count': 0, 'total': 0, 'max': 0, 'buckets': [0]*(len(API_SIGNAL_TIMING_BUCKETS_MS)+1)} )
+		timing['count'] += 1
+		timing['total'] += elapsedMs
+		timing['max'] = max(timing['max'], elapsedMs)
+		timing['buckets'][next(
+			(i for i, bound in enumerate(API_SIGNAL_TIMING_BUCKETS_MS) if elapsedMs < bound),
+			len(API_SIGNAL_TIMING_BUCKETS_MS) )] += 1
+		
+		if elapsedMs > API_SLOW_WARN_MS:
+			log.warn(f'slow video signal handler: {callback} took {elapsedMs:0.0f}ms/{API_SLOW_WARN_MS}ms to handle {payload.signal}.')
+	
+	
+	def observe(self, signal: str, handler: Callable[[SignalPayload], None], *, deferred: bool = False) -> None:
+		"""Add a function to get called when a D-BUS signal is emitted.
+			
+			If deferred, the handler is called when the GUI is idle instead
+			of right away. Use this for anything which doesn't need to
+			happen promptly, such as updating the display."""
 		assert callable(handler), f"Handler is not callable. (Expected function, got {handler}.)"
-		self._signalObservers[signal].append(handler)
+		(self._deferredObservers if deferred else self._signalObservers)[signal].append(handler)
 	
-	def unobserve(self, signal: str, handler: Callable[[Any], None]) -> None:
+	def unobserve(self, signal: str, handler: Callable[[SignalPayload], None]) -> None:
 		"""Stop a function from getting called when a D-BUS signal is emitted."""
 		assert callable(handler), f"Handler is not callable. (Expected function, got {handler}.)"
-		self._signalObservers[signal].remove(handler)
-signal = Signal()
+		if handler in self._deferredObservers[signal]:
+			self._deferredObservers[signal].remove(handler)
+		else:
+			self._signalObservers[signal].remove(handler)
+	
+	def handlerTimings(self) -> Dict[str, Dict[str, Any]]:
+		"""Return how long each handler has taken to run, in ms.
+			
+			Keyed by 'signal handler'. The histogram maps each bucket's
+			upper bound (see API_SIGNAL_TIMING_BUCKETS_MS) to the number
+			of runs which fell into it."""
+		bounds = [f'<{bound}ms' for bound in API_SIGNAL_TIMING_BUCKETS_MS] + [f'≥{API_SIGNAL_TIMING_BUCKETS_MS[-1]}ms']
+		return {
+			f'{signal_} {name}': {
+				'count': timing['count'],
+				'mean': timing['total'] / timing['count'],
+				'max': timing['max'],
+				'histogram': dict(zip(bounds, timing['buckets'])),
+			}
+			for (signal_, name), timing in self._timings.items()
+		}
+with startup_profile.span('connect video api signals', 'dbus'):
+	signal = Signal()
 del Signal
 
 
@@ -639,6 +1686,8 @@ del Signal
 ##############################
 
 class ExternalPartitions(QObject):
+	_usageMeasured = pyqtSignal(str, int, object) #device, generation, usage or OSError; sent from the usage worker thread.
+	
 	def __init__(self):
 		"""
 			Get _partitions, a list of things you can save video to.
@@ -650,6 +1699,7 @@ class ExternalPartitions(QObject):
 				"size": 1294839100, #bytes, 64-bit positive integer
 				"readOnly": False,
 				"interface": "usb", #"usb" or "sd"
+				"stale": True, #Only set on partitions remembered from last time we ran, before UDisks2 is heard from.
 			}
 		"""
 		super().__init__()
@@ -657,30 +1707,28 @@ class ExternalPartitions(QObject):
 		
 		#observers collection
 		self._callbacks = []
-		self.uDisks2ObjectManager = QDBusInterface(
-			f"org.freedesktop.UDisks2", #Service
-			f"/org/freedesktop/UDisks2", #Path
-			f"org.freedesktop.DBus.ObjectManager", #Interface
-			QDBusConnection.systemBus(),
-		)
-		self.uDisks2ObjectManager.setTimeout(10) #Set to 1000 after startup period.
-		
-		#Retry. This doesn't connect the first time, no matter what the time limit is. I don't know why, probably something in the start-on-demand logic.
-		if not self.uDisks2ObjectManager.isValid():
-			self.uDisks2ObjectManager = QDBusInterface(
-				f"org.freedesktop.UDisks2", #Service
-				f"/org/freedesktop/UDisks2", #Path
-				f"org.freedesktop.DBus.ObjectManager", #Interface
-				QDBusConnection.systemBus(),
-			)
-			self.uDisks2ObjectManager.setTimeout(10)
-			
-			if not self.uDisks2ObjectManager.isValid():
-				log.critical(f"Error: Can not connect to udisks2 at {self.uDisks2ObjectManager.service()}. ({self.uDisks2ObjectManager.lastError().name()}: {self.uDisks2ObjectManager.lastError().message()}) Try running `apt install udisks2`?")
-				raise Exception("D-Bus Setup Error")
 		
-		self.uDisks2ObjectManager.setTimeout(1000)
+		#Disk usage, measured in a worker thread. See usageFor().
+		self._usage = {} #device: (perf_counter when measured, usage)
+		self._usageCallbacks = {} #device: [callback, …], waiting on a measurement in flight
+		self._usageGeneration = defaultdict(int) #device: generation, incremented to invalidate measurements of it in flight
+		self._usageWorker = ThreadPoolExecutor(max_workers=1)
+		self._usageMeasured.connect(self.__usageMeasured)
 		
+		#Until UDisks2 is started, serve what was mounted last time we ran.
+		#These partitions are marked 'stale', since they may not be there now.
+		self.ready = Promise() #Resolved once we've heard from UDisks2, and _partitions is current.
+		self._partitions = [
+			{**partition, 'path': partition['path'].encode('utf-8'), 'stale': True}
+			for partition in settings.value('last known external partitions', [])
+		]
+	
+	def start(self):
+		"""Connect to UDisks2, without blocking. Until that's done, the list
+			of partitions is the one we had when we last ran.
+			
+			This is called once the first screen is up, since UDisks2 can
+			take a while to get going at boot."""
 		
 		#The .connect call freezes if we don't do this, or if we do this twice.
 		#This bug was fixed by Qt 5.11.
@@ -705,8 +1753,35 @@ class ExternalPartitions(QObject):
 			self.__interfacesRemovedEvent,
 		)	
 		
-		for name, data in QDBusReply(self.uDisks2ObjectManager.call('GetManagedObjects')).value().items():
-			self.__interfacesAdded(name, data)
+		self._acquireObjectsCall = _asyncSystemCall(
+			f"org.freedesktop.UDisks2", #Service
+			f"/org/freedesktop/UDisks2", #Path
+			f"org.freedesktop.DBus.ObjectManager", #Interface
+			'GetManagedObjects', #Method
+			timeout = 10000, #Starting UDisks2 on demand can be slow.
+		)
+		self._acquireObjectsCall.finished.connect(self.__acquireObjects)
+	
+	def __acquireObjects(self, reply):
+		reply = QDBusPendingReply(reply)
+		self._acquireObjectsCall = None
+		if reply.isError():
+			log.critical(f"Error: Can not connect to udisks2. ({reply.error().name()}: {reply.error().message()}) Try running `apt install udisks2`?")
+			self._partitions = [p for p in self._partitions if not p.get('stale')] #We can't tell what's mounted, so don't offer what was.
+			for callback in self._callbacks:
+				callback(self._partitions)
+			self.ready._reject(DBusException(f"{reply.error().name()}: {reply.error().message()}"))
+			return
+		
+		self._partitions = []
+		for name, data in reply.value().items():
+			self.__interfacesAdded(name, data, notify=False)
+		self.__partitionsChanged()
+		self.ready._resolve(self._partitions)
+	
+	def isReady(self):
+		"""True once the partition list comes from UDisks2, rather than from last time we ran."""
+		return self.ready._done and not self.ready._error
 	
 	def __getitem__(self, i):
 		return self._partitions[i]
@@ -737,7 +1812,7 @@ class ExternalPartitions(QObject):
 	def __interfacesAddedEvent(self, msg):
 		self.__interfacesAdded(*msg.arguments())
 	
-	def __interfacesAdded(self, name, data):
+	def __interfacesAdded(self, name, data, *, notify=True):
 		if 'org.freedesktop.UDisks2.Filesystem' in data:
 			#"Now, for each file system which just got mounted, …"
 			
@@ -750,6 +1825,7 @@ class ExternalPartitions(QObject):
 				return
 			
 			log.debug(f"Partition mounted at {bytes(data['org.freedesktop.UDisks2.Filesystem']['MountPoints'][0]).decode('utf-8')}.") #toStdString() doesn't seem to exist, perhaps because we don't have std strings.
+			self.invalidateUsage(name)
 			
 			self._partitions += [{
 				'name': data['org.freedesktop.UDisks2.Block']['IdLabel'],
@@ -760,8 +1836,7 @@ class ExternalPartitions(QObject):
 				'readOnly': data['org.freedesktop.UDisks2.Block']['ReadOnly'],
 				'interface': 'usb' if True in [b'usb' in symlink for symlink in data['org.freedesktop.UDisks2.Block']['Symlinks']] else 'other', #This data comes in one message earlier, but it would be enough complexity to link the two that it makes more sense to just string match here.
 			}]
-			for callback in self._callbacks:
-				callback(self._partitions)
+			notify and self.__partitionsChanged()
 	
 	
 	@pyqtSlot('QDBusMessage')
@@ -771,59 +1846,119 @@ class ExternalPartitions(QObject):
 	def __interfacesRemoved(self, name, data):
 		if 'org.freedesktop.UDisks2.Partition' == data[0]:
 			#"Now, for each file system which just got removed, …"
+			self.invalidateUsage(name)
 			self._partitions = list(filter(
 				lambda partition: partition["device"] != name, 
 				self._partitions ) )
-			for callback in self._callbacks:
-				callback(self._partitions)
+			self.__partitionsChanged()
+	
+	def __partitionsChanged(self):
+		settings.setValue('last known external partitions', [
+			{**partition, 'path': partition['path'].decode('utf-8', 'replace')}
+			for partition in self._partitions
+		])
+		for callback in self._callbacks:
+			callback(self._partitions)
 	
 	
 	def list(self):
 		return self._partitions
 	
 	def usageFor(self, device: str, callback: Callable[[], Dict[str,int]]):
-		for partition in self._partitions:
-			if partition['device'] == device:
-				df = subprocess.Popen(
-					['df', partition['path'], '--output=avail,used'], #used+avail != 1k-blocks
-					stdout=subprocess.PIPE,
-					stderr=subprocess.DEVNULL )
-				
-				def checkDf(*, timeout):
-					exitStatus = df.poll()
-					if exitStatus is None: #Still running, check again later.
-						#Standard clamped exponential decay. Keeps polling to a reasonable amount, frequent at first then low.
-						delay(self, timeout, lambda:
-							checkDf(timeout=max(1, timeout*2)) )
-					elif exitStatus: #df failure, raise an error
-						if exitStatus == 1:
-							#When a storage device with multiple partitions is removed,
-							#the observer fires once for each partition. This means
-							#that, for one partition, the client will issue a spurious
-							#call to this function with the stale partition's device.
-							log.debug(f'Unknown device {device}.')
-							log.debug(f'Known devices are {[p["device"] for p in self._partitions]}.')
-						else:
-							raise Exception(f'df exited with error {exitStatus}')
-					else:
-						info = ( #Chop up df command output.
-							df.communicate()[0]
-							.split(b'\n')[1] #Remove first line, column headings
-							.split() #Each output is now in a list.
-						)
-						callback({
-							'available': int(info[0]),
-							'used': int(info[1]),
-							'total': int(info[0]) + int(info[1]),
-						})
-				delay(self, 0.20, lambda: #Initial delay, df usually runs in .17s.
-					checkDf(timeout=0.05) )
+		"""Call callback with the disk usage of device, in 1k blocks.
+			
+			Usage is {'available': int, 'used': int, 'total': int}. It's
+			measured with statvfs in a worker thread, since a slow or
+			sleeping drive can take a while to answer. Measurements are
+			reused for API_DISK_USAGE_TTL_MS, and callers asking while a
+			measurement is in flight share it.
+			
+			Stale partitions, remembered from last time we ran, aren't
+			measured, since they may not be mounted any more. Callback
+			isn't called for them. Observers are called again once the
+			current partitions are known."""
+		
+		partition = next((p for p in self._partitions if p['device'] == device), None)
+		if not partition:
+			#When a storage device with multiple partitions is removed,
+			#the observer fires once for each partition. This means
+			#that, for one partition, the client will issue a spurious
+			#call to this function with the stale partition's device.
+			log.debug(f'Unknown device {device}.')
+			log.debug(f'Known devices are {[p["device"] for p in self._partitions]}.')
+			return
+		if partition.get('stale'):
+			return
+		
+		measured = self._usage.get(device)
+		if measured and (perf_counter() - measured[0])*1000 < API_DISK_USAGE_TTL_MS:
+			callback(measured[1])
+			return
+		
+		if device in self._usageCallbacks:
+			self._usageCallbacks[device] += [callback]
+			return
+		
+		self._usageCallbacks[device] = [callback]
+		self._usageWorker.submit(self.__measureUsage, device, partition['path'], self._usageGeneration[device])
+	
+	def invalidateUsage(self, device: str = None):
+		"""Forget the measured usage of device, or of all devices, because it's changed."""
+		if device is None:
+			for each in set(self._usageGeneration) | set(self._usageCallbacks): #Measurements in flight have callbacks waiting.
+				self._usageGeneration[each] += 1
+			self._usage.clear()
+		else:
+			self._usageGeneration[device] += 1
+			self._usage.pop(device, None)
+	
+	def __measureUsage(self, device, path, generation):
+		"""Measure usage like `df --output=avail,used` does. Runs on the worker thread."""
+		try:
+			stat = os.statvfs(path)
+			available = stat.f_bavail * stat.f_frsize // 1024
+			used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize // 1024 #used+avail != 1k-blocks, as with df.
+			usage = {
+				'available': available,
+				'used': used,
+				'total': available + used,
+			}
+		except OSError as error:
+			usage = error
+		self._usageMeasured.emit(device, generation, usage)
+	
+	@pyqtSlot(str, int, object)
+	def __usageMeasured(self, device, generation, usage):
+		callbacks = self._usageCallbacks.pop(device, [])
+		if isinstance(usage, OSError):
+			log.error(f'Could not measure usage of {device}: {usage}')
+			return
+		if generation == self._usageGeneration[device]: #Otherwise, it may be out of date already.
+			self._usage[device] = (perf_counter(), usage)
+		for callback in callbacks:
+			callback(usage)
 externalPartitions = ExternalPartitions()
 del ExternalPartitions
 
 
 
 class NetworkInterfaces(QObject):
+	#The NetworkManager properties we keep track of for each device, by interface, and what we keep them as.
+	_trackedProperties = {
+		'org.freedesktop.NetworkManager.Device': {
+			'Interface': 'Interface', 'Ip4Address': 'Ip4Address',
+			'Ip6Config': 'Ip6Config', 'Dhcp4Config': 'Dhcp4Config', 'Dhcp6Config': 'Dhcp6Config' },
+		'org.freedesktop.NetworkManager.Device.Wired': { 'Carrier': 'Carrier' },
+		'org.freedesktop.NetworkManager.IP6Config': { 'Addresses': 'Ip6Addresses' },
+	}
+	
+	#The config objects a device points to, which we watch for changes too.
+	_configInterfaces = {
+		'Ip6Config': 'org.freedesktop.NetworkManager.IP6Config',
+		'Dhcp4Config': 'org.freedesktop.NetworkManager.DHCP4Config',
+		'Dhcp6Config': 'org.freedesktop.NetworkManager.DHCP6Config',
+	}
+	
 	def __init__(self):
 		"""
 			NetworkInterfaces is a list of the plugged-in network connections.
@@ -842,34 +1977,30 @@ class NetworkInterfaces(QObject):
 			
 		"""
 		super().__init__()
-		self._connections = []
+		self._networkInterfaces = [] #Device paths, in the order NetworkManager lists them.
+		self._properties = {} #Device path: {property: value}, kept up to date by PropertiesChanged.
+		self._configOwners = {} #Config object path: device path.
+		self._connectionsByPath = {} #Device path: connection, or None if not connected.
+		self._pendingFetches = {} #(path, interface): QDBusPendingCallWatcher
+		self._staleFetches = set() #(path, interface)s which changed while being fetched.
+		self._notifyTimer = delay(self, 0, self.__notify, paused=True)
 		
 		#observers collection
 		self._callbacks = []
-		self.networkManager = QDBusInterface(
-			f"org.freedesktop.NetworkManager", #Service
-			f"/org/freedesktop/NetworkManager", #Path
-			f"org.freedesktop.NetworkManager", #Interface
-			QDBusConnection.systemBus(),
-		)
-		self.networkManager.setTimeout(10) #Set to 1000 after startup period.
-		
-		#Retry. This doesn't connect the first time, no matter what the time limit is. I don't know why, probably something in the start-on-demand logic.
-		if not self.networkManager.isValid():
-			self.networkManager = QDBusInterface(
-				f"org.freedesktop.NetworkManager", #Service
-				f"/org/freedesktop/NetworkManager", #Path
-				f"org.freedesktop.NetworkManager", #Interface
-				QDBusConnection.systemBus(),
-			)
-			self.networkManager.setTimeout(10)
-			
-			if not self.networkManager.isValid():
-				log.critical(f"Error: Can not connect to NetworkManager at {self.networkManager.service()}. ({self.networkManager.lastError().name()}: {self.networkManager.lastError().message()}) Try running `apt install network-manager`?")
-				raise Exception("D-Bus Setup Error")
-		
-		self.networkManager.setTimeout(1000)
 		
+		#Until NetworkManager is started, serve the connections we had last time we ran.
+		self.ready = Promise() #Resolved once we've heard from NetworkManager about every device, and _connections is current.
+		self._connections = [
+			{**connection, 'address': ip_address(connection['address'])}
+			for connection in settings.value('last known network interfaces', [])
+		]
+	
+	def start(self):
+		"""Connect to NetworkManager, without blocking. Until that's done,
+			the connections are the ones we had when we last ran.
+			
+			This is called once the first screen is up, since
+			NetworkManager can take a while to get going at boot."""
 		
 		#The .connect call freezes if we don't do this, or if we do this twice.
 		#This bug was fixed by Qt 5.11.
@@ -878,10 +2009,19 @@ class NetworkInterfaces(QObject):
 			self,
 		)
 		
-		self._acquireInterfacesCall = QDBusPendingCallWatcher(
-			self.networkManager.asyncCall('GetDevices')
+		self._acquireInterfacesCall = _asyncSystemCall(
+			f"org.freedesktop.NetworkManager", #Service
+			f"/org/freedesktop/NetworkManager", #Path
+			f"org.freedesktop.NetworkManager", #Interface
+			'GetDevices', #Method
+			timeout = 10000, #Starting NetworkManager on demand can be slow.
 		)
 		self._acquireInterfacesCall.finished.connect(self._acquireInterfaceData)
+	
+	def isReady(self):
+		"""True once the connections come from NetworkManager, rather than from last time we ran."""
+		return self.ready._done and not self.ready._error
+	
 	def _acquireInterfaceData(self, reply):
 		"""Continuation of __init__.
 		
@@ -892,7 +2032,7 @@ class NetworkInterfaces(QObject):
 			https://stackoverflow.com/questions/20042995/error-getting-dbus-interface-property-with-qdbusinterface
 			which is directly relevant to our situation shows it working. Yet,
 			I cannot figure out how to port it to Python. So we do it manually
-			with the `'* property interface'`s.
+			with org.freedesktop.DBus.Properties' GetAll.
 					Note: https://doc.qt.io/archives/qt-5.7/qnetworkinterface.html is
 			a thing. Shame it doesn't have notification events.
 					Command-line based examples:
@@ -931,104 +2071,33 @@ class NetworkInterfaces(QObject):
 		"""
 		
 		reply = QDBusPendingReply(reply)
+		self._acquireInterfacesCall = None
 		if reply.isError():
-			raise DBusException("%s: %s" % (reply.error().name(), reply.error().message()))
+			log.critical(f"Error: Can not connect to NetworkManager. ({reply.error().name()}: {reply.error().message()}) Try running `apt install network-manager`?")
+			self.ready._reject(DBusException(f"{reply.error().name()}: {reply.error().message()}"))
+			return
 		reply = reply.value()
 		
-		self._networkInterfaces = [{
-			'Device': QDBusInterface( #Provides node.
-				f"org.freedesktop.NetworkManager", #Service
-				devicePath, #Path
-				f"org.freedesktop.NetworkManager.Device", #Interface
-				QDBusConnection.systemBus(),
-			),
-			'Device.Wired': QDBusInterface( #Provides node.
-				f"org.freedesktop.NetworkManager", #Service
-				devicePath, #Path
-				f"org.freedesktop.NetworkManager.Device.Wired", #Interface
-				QDBusConnection.systemBus(),
-			),
-			'Device property interface': QDBusInterface( #Provides interface to get properties of previous node, because `.property()` is broken.
-				"org.freedesktop.NetworkManager", #Service
-				devicePath, #Path
-				"org.freedesktop.DBus.Properties",#Interface
-				QDBusConnection.systemBus()
-			),
-		} for devicePath in reply ]
-		
-		for interfaces in self._networkInterfaces:
-			for networkInterface in interfaces.values():
-				networkInterface.setTimeout(1000)
-				if not networkInterface.isValid():
-					log.critical(f"Error: Can not connect to NetworkManager at {networkInterface.service()}. ({networkInterface.lastError().name()}: {networkInterface.lastError().message()}) Try running `apt install network-manager`?")
-					raise Exception("D-Bus Setup Error")
+		for devicePath in reply:
+			devicePath = str(devicePath.path() if hasattr(devicePath, 'path') else devicePath)
+			self._networkInterfaces += [devicePath]
+			self._properties[devicePath] = {}
 			
 			#Deadlock fix as above.
-			QDBusConnection.systemBus().registerObject(
-				interfaces['Device'].path(), self )
+			QDBusConnection.systemBus().registerObject(devicePath, self)
 			
-			#Use above interface to look up the IP address interfaces.
-			interfaces['Ip4Config'] = QDBusInterface( #Provides interface to get properties of previous node, because `.property()` is broken.
-				"org.freedesktop.NetworkManager", #Service
-				QDBusReply(interfaces['Device property interface'].call('Get', #Method
-					'org.freedesktop.NetworkManager.Device', 'Ip4Config' )).value(), #Interface, Property → Path
-				"org.freedesktop.NetworkManager.IP4Config", #Interface
-				QDBusConnection.systemBus()
-			)
-			interfaces['Ip4Config property interface'] = QDBusInterface( #Provides interface to get properties of previous node, because `.property()` is broken.
-				"org.freedesktop.NetworkManager", #Service
-				interfaces['Ip4Config'].path(), #Path
-				"org.freedesktop.DBus.Properties",#Interface
-				QDBusConnection.systemBus()
-			)
-			
-			interfaces['Ip6Config'] = QDBusInterface( #Provides interface to get properties of previous node, because `.property()` is broken.
-				"org.freedesktop.NetworkManager", #Service
-				QDBusReply(interfaces['Device property interface'].call('Get', #Method
-					'org.freedesktop.NetworkManager.Device', 'Ip6Config' )).value(), #Interface, Property → Path
-				"org.freedesktop.NetworkManager.IP6Config", #Interface
-				QDBusConnection.systemBus()
-			)
-			interfaces['Ip6Config property interface'] = QDBusInterface( #Provides interface to get properties of previous node, because `.property()` is broken.
-				"org.freedesktop.NetworkManager", #Service
-				interfaces['Ip6Config'].path(), #Path
-				"org.freedesktop.DBus.Properties",#Interface
-				QDBusConnection.systemBus()
-			)
-			
-			#Subscribe to network update signals, for ip address and carrier status.
-			QDBusConnection.systemBus().connect(
-				f"org.freedesktop.NetworkManager", #Service
-				interfaces['Device'].path(),
-				f"org.freedesktop.NetworkManager.Device", #Interface
-				'PropertiesChanged', #Signal
-				self.__interfacePropertiesChangedEvent,
-			)
-			QDBusConnection.systemBus().connect(
-				f"org.freedesktop.NetworkManager", #Service
-				interfaces['Device'].path(),
-				f"org.freedesktop.NetworkManager.Device.Wired", #Interface
-				'PropertiesChanged', #Signal
-				self.__interfacePropertiesChangedEvent,
-			)
-			QDBusConnection.systemBus().connect( #untested, don't know how to change ip4 address
-				f"org.freedesktop.NetworkManager", #Service
-				QDBusReply(interfaces['Device property interface'].call('Get',
-					'org.freedesktop.NetworkManager.Device', 'Dhcp4Config' ) ).value(), #Interface, Property → Path
-				f"org.freedesktop.NetworkManager.Dhcp4Config", #Interface
-				'PropertiesChanged', #Signal
-				self.__interfacePropertiesChangedEvent,
-			)
-			QDBusConnection.systemBus().connect( #untested, don't know how to change ip6 address
-				f"org.freedesktop.NetworkManager", #Service
-				QDBusReply(interfaces['Device property interface'].call('Get',
-					'org.freedesktop.NetworkManager.Device', 'Dhcp6Config' ) ).value(), #Interface, Property → Path
-				f"org.freedesktop.NetworkManager.Dhcp6Config", #Interface
-				'PropertiesChanged', #Signal
-				self.__interfacePropertiesChangedEvent,
-			)
-			
-		self.__rescan()
+			#Subscribe to network update signals, for ip address and carrier status. The config objects are subscribed to as we find out where they are.
+			for interface in ('org.freedesktop.NetworkManager.Device', 'org.freedesktop.NetworkManager.Device.Wired'):
+				QDBusConnection.systemBus().connect(
+					f"org.freedesktop.NetworkManager", #Service
+					devicePath,
+					interface,
+					'PropertiesChanged', #Signal
+					self.__interfacePropertiesChangedEvent,
+				)
+				self.__fetchProperties(devicePath, devicePath, interface)
+		
+		self.__checkReady()
 	
 	def __getitem__(self, i):
 		return self._connections[i]
@@ -1059,62 +2128,144 @@ class NetworkInterfaces(QObject):
 	
 	@pyqtSlot('QDBusMessage')
 	def __interfacePropertiesChangedEvent(self, msg):
-		log.info(f'Rescanning, network change detected. ({msg.arguments()})')
-		self.__rescan()
-	
-	def __rescan(self):
-		self._connections.clear()
-		for interfaces in self._networkInterfaces:
-			carrier = QDBusReply(
-				interfaces['Device property interface'].call('Get',
-					'org.freedesktop.NetworkManager.Device.Wired', 'Carrier' ) ) #Interface, Property
-			if carrier.isValid() and carrier.value():
-				try:
-					addr = IPv4Address(
-						QDBusReply(
-							interfaces['Device property interface'].call(
-								'Get', #Method
-								'org.freedesktop.NetworkManager.Device', #Interface
-								'Ip4Address', #Property
-							)
-						).value()
-					)
-					addr = IPv4Address('.'.join(reversed(str(addr).split('.')))) #So close. Truly, if there's two ways of representing information… (note: This is actually Python's fault here, the number parses fine in a browser address bar.)
-				except AddressValueError:
-					try:
-						#"Array of tuples of IPv4 address/prefix/gateway. All 3 elements of each tuple are in network byte order. Essentially: [(addr, prefix, gateway), (addr, prefix, gateway), ...]"
-						#	-- https://developer.gnome.org/NetworkManager/0.9/spec.html
-						addr = IPv6Address(bytes(
-							QDBusReply(
-								interfaces['Ip6Config property interface'].call(
-									'Get', #Method
-									'org.freedesktop.NetworkManager.IP6Config', #Interface
-									'Addresses', #Property
-								)
-							).value()[-1][0]
-						))
-					except (AddressValueError, IndexError):
-						addr = None
-				
-				interface = QDBusReply(
-					interfaces['Device property interface'].call(
-						'Get', #Method
-						'org.freedesktop.NetworkManager.Device', #Interface
-						'Interface', #Property
-					)
-				).value()
-				
-				if addr:
-					self._connections.append({
-						'path': interfaces['Device'].path(),
-						'name': defaultdict(
-							lambda: 'generic connection', 
-							{'e': 'ethernet', 'u': 'usb'}
-						)[interface[0]],
-						'address': addr,
-					})
+		devicePath = self._configOwners.get(msg.path(), msg.path())
+		if devicePath not in self._properties:
+			return
+		
+		changes = msg.arguments()[0] if msg.arguments() else None
+		if msg.interface() in self._trackedProperties and isinstance(changes, dict):
+			log.debug(f'Network change detected on {devicePath}. ({changes})')
+			self.__applyProperties(devicePath, msg.interface(), changes)
+		else: #DHCP lease changes don't say what happened to the address, so look it up again.
+			log.debug(f'Refetching {devicePath}, {msg.interface()} changed.')
+			self.__fetchProperties(devicePath, devicePath, 'org.freedesktop.NetworkManager.Device')
+			ip6Config = self._properties[devicePath].get('Ip6Config')
+			if ip6Config:
+				self.__fetchProperties(devicePath, ip6Config, 'org.freedesktop.NetworkManager.IP6Config')
+	
+	def __fetchProperties(self, devicePath, objectPath, interface):
+		"""Get all of an object's properties on interface, without blocking, and apply them to devicePath.
+			
+			If the properties are already being fetched, they are fetched
+			again once that finishes, since they may have changed since."""
+		
+		if (objectPath, interface) in self._pendingFetches:
+			self._staleFetches.add((objectPath, interface))
+			return
+		
+		watcher = _asyncSystemCall(
+			"org.freedesktop.NetworkManager", #Service
+			objectPath, #Path
+			"org.freedesktop.DBus.Properties", #Interface
+			'GetAll', #Method
+			interface,
+		)
+		watcher.finished.connect(partial(self.__propertiesFetched, devicePath, objectPath, interface))
+		self._pendingFetches[objectPath, interface] = watcher #Keep the watcher alive until it's done.
+	
+	def __propertiesFetched(self, devicePath, objectPath, interface, watcher):
+		del self._pendingFetches[objectPath, interface]
+		if (objectPath, interface) in self._staleFetches:
+			self._staleFetches.remove((objectPath, interface))
+			self.__fetchProperties(devicePath, objectPath, interface)
+		
+		reply = QDBusPendingReply(watcher)
+		if reply.isError():
+			#Not all devices are wired, and config objects come and go. Treat the interface as having no properties, but still count it as fetched.
+			log.debug(f'Could not get {interface} properties of {objectPath}. ({reply.error().name()}: {reply.error().message()})')
+		elif self._properties.get(devicePath) is not None:
+			self.__applyProperties(devicePath, interface, reply.value())
+		
+		self.__checkReady()
+	
+	def __checkReady(self):
+		"""Once everything we asked NetworkManager about at startup has come back, replace the connections from last time."""
+		if not self.ready._done and not self._pendingFetches:
+			self.__notify()
+			self.ready._resolve(self._connections)
+	
+	def __applyProperties(self, devicePath, interface, changes):
+		"""Update the cached properties of a device, and notify observers if its connection changed as a result."""
+		properties = self._properties[devicePath]
+		for name, key in self._trackedProperties[interface].items():
+			if name not in changes:
+				continue
+			
+			value = changes[name]
+			if key in self._configInterfaces:
+				value = str(value.path() if hasattr(value, 'path') else value)
+				if value == '/': #No config object at the moment.
+					value = None
+				if value != properties.get(key):
+					self.__followConfig(devicePath, key, properties.get(key), value)
+			properties[key] = value
+		
+		connection = self.__connection(devicePath)
+		if connection != self._connectionsByPath.get(devicePath):
+			self._connectionsByPath[devicePath] = connection
+			if self.ready._done:
+				self._notifyTimer.isActive() or self._notifyTimer.start() #Wait for the rest of the burst.
+	
+	def __followConfig(self, devicePath, key, oldPath, newPath):
+		"""Move our PropertiesChanged subscription for one of a device's config objects to its new path."""
+		interface = self._configInterfaces[key]
+		if oldPath:
+			QDBusConnection.systemBus().disconnect(
+				f"org.freedesktop.NetworkManager", oldPath, interface,
+				'PropertiesChanged', self.__interfacePropertiesChangedEvent )
+			self._configOwners.pop(oldPath, None)
+		if newPath:
+			self._configOwners[newPath] = devicePath
+			QDBusConnection.systemBus().connect(
+				f"org.freedesktop.NetworkManager", newPath, interface,
+				'PropertiesChanged', self.__interfacePropertiesChangedEvent )
+			if key == 'Ip6Config':
+				self.__fetchProperties(devicePath, newPath, interface)
+		elif key == 'Ip6Config':
+			self._properties[devicePath].pop('Ip6Addresses', None)
+	
+	def __connection(self, devicePath):
+		"""The connection a device provides, from its cached properties, or None if it isn't connected."""
+		properties = self._properties[devicePath]
+		if not properties.get('Carrier') or not properties.get('Interface'):
+			return None
+		
+		addr = None
+		if properties.get('Ip4Address'):
+			try:
+				addr = IPv4Address(properties['Ip4Address'])
+				addr = IPv4Address('.'.join(reversed(str(addr).split('.')))) #So close. Truly, if there's two ways of representing information… (note: This is actually Python's fault here, the number parses fine in a browser address bar.)
+			except AddressValueError:
+				addr = None
+		if not addr:
+			try:
+				#"Array of tuples of IPv4 address/prefix/gateway. All 3 elements of each tuple are in network byte order. Essentially: [(addr, prefix, gateway), (addr, prefix, gateway), ...]"
+				#	-- https://developer.gnome.org/NetworkManager/0.9/spec.html
+				addr = IPv6Address(bytes(properties['Ip6Addresses'][-1][0]))
+			except (KeyError, AddressValueError, IndexError):
+				return None
+		
+		return {
+			'path': devicePath,
+			'name': defaultdict(
+				lambda: 'generic connection', 
+				{'e': 'ethernet', 'u': 'usb'}
+			)[properties['Interface'][0]],
+			'address': addr,
+		}
+	
+	def __notify(self):
+		self._connections[:] = [
+			self._connectionsByPath[devicePath]
+			for devicePath in self._networkInterfaces
+			if self._connectionsByPath.get(devicePath)
+		]
 		
 		log.info(f'conns: {self._connections}')
+		settings.setValue('last known network interfaces', [
+			{**connection, 'address': str(connection['address'])}
+			for connection in self._connections
+		])
 		
 		for callback in self._callbacks:
 			callback(self._connections)
@@ -1123,10 +2274,23 @@ networkInterfaces = NetworkInterfaces()
 del NetworkInterfaces
 
 
+def startSystemServices():
+	"""Connect to UDisks2 and NetworkManager.
+		
+		Not done on import, so starting the gui doesn't wait on them. Until
+		each is ready, it serves what it knew the last time we ran. See
+		externalPartitions.ready and networkInterfaces.ready."""
+	
+	started = perf_counter()
+	externalPartitions.start()
+	externalPartitions.ready.then(lambda _: startup_profile.complete('udisks2 bootstrap', 'dbus', started))
+	networkInterfaces.start()
+	networkInterfaces.ready.then(lambda _: startup_profile.complete('networkmanager bootstrap', 'dbus', started))
+
+
 
 #Perform self-test if launched as a standalone.
 if __name__ == '__main__':
-	from PyQt5.QtCore import QCoreApplication
 	import signal as sysSignal
 	
 	app = QCoreApplication(sys.argv)
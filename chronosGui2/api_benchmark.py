@@ -0,0 +1,306 @@
+#!/usr/bin/python3
+# -*- coding: future_fstrings -*-
+"""Benchmark the D-Bus API layer, headless, against the API mocks.
+
+	Starts a private dbus-daemon, runs control_api_mock and video_api_mock
+	on it in a separate process, and times api.py talking to them. Nothing
+	on the real system bus is touched, so this can run on a dev box or in
+	CI as well as on a camera.
+	
+	Usage:
+		python3 -m chronosGui2.api_benchmark [--iterations 100] [--burden 2] [--output results.json]
+	
+	Results are written as JSON, so they can be compared between releases.
+	All times are in milliseconds. The benchmarks are:
+		sync: Round trip of callSync('get'), one after another.
+		async: Many call('get')s in flight at once.
+		chained: Each get() started from the previous one's then().
+		batched: Many get()s in one event loop tick, with batchGets on.
+		notify: From set() to the observer hearing the new value.
+		sliderDrag: One set() per frame for a second, like dragging a slider.
+			Reports how many calls actually went over the wire.
+	
+	With --burden N, everything is run again while N copies of `yes` keep
+	the CPU busy, to see how we hold up while the camera is working hard.
+"""
+
+import sys, os
+import json
+import types
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from time import perf_counter
+
+#Keys which the mocks are happy to have us get and set.
+GET_KEY = 'batteryVoltage' #Quintessentially cheap.
+SET_KEY = 'wbTemperature'
+
+
+def summarise(samples):
+	"""Describe a list of times in ms."""
+	samples = sorted(samples)
+	if not samples:
+		return {'n': 0}
+	percentile = lambda p: samples[min(len(samples)-1, len(samples)*p//100)]
+	return {
+		'n': len(samples),
+		'mean': sum(samples) / len(samples),
+		'min': samples[0],
+		'p50': percentile(50),
+		'p90': percentile(90),
+		'p99': percentile(99),
+		'max': samples[-1],
+	}
+
+
+def wireCalls(promises):
+	"""Count the calls which were actually sent, rather than coalesced into another call or elided."""
+	riders = {id(rider) for promise in promises for rider in promise._riders}
+	return sum(1 for promise in promises if promise.performance['started'] and id(promise) not in riders)
+
+
+def callTimings(promises):
+	return {
+		'queue': summarise([(p.performance['started'] - p.performance['enqueued'])*1000 for p in promises if p.performance['started']]),
+		'wire': summarise([(p.performance['finished'] - p.performance['started'])*1000 for p in promises if p.performance['started']]),
+	}
+
+
+
+#################################
+#    Benchmarks (coroutines)    #
+#################################
+
+async def benchmarkSync(api, iterations):
+	control = api.control()
+	samples = []
+	for _ in range(iterations):
+		start = perf_counter()
+		control.callSync('get', [GET_KEY])
+		samples += [(perf_counter() - start)*1000]
+	return {'call': summarise(samples)}
+
+
+async def benchmarkAsync(api, iterations):
+	control = api.control()
+	start = perf_counter()
+	promises = [control.call('get', [GET_KEY]) for _ in range(iterations)]
+	await api.gather(*promises)
+	total = (perf_counter() - start)*1000
+	return {'total': total, 'perCall': total / iterations, **callTimings(promises)}
+
+
+async def benchmarkChained(api, iterations):
+	control = api.control()
+	samples = []
+	start = perf_counter()
+	for _ in range(iterations):
+		callStart = perf_counter()
+		await control.get(GET_KEY)
+		samples += [(perf_counter() - callStart)*1000]
+	total = (perf_counter() - start)*1000
+	return {'total': total, 'perCall': total / iterations, 'call': summarise(samples)}
+
+
+async def benchmarkBatched(api, iterations):
+	control = api.control()
+	batchGets = control.batchGets
+	control.batchGets = True
+	try:
+		start = perf_counter()
+		promises = [control.get(GET_KEY) for _ in range(iterations)]
+		await api.gather(*promises)
+		total = (perf_counter() - start)*1000
+	finally:
+		control.batchGets = batchGets
+	return {'total': total, 'perCall': total / iterations, 'wireCalls': wireCalls(promises)}
+
+
+async def benchmarkNotify(api, iterations):
+	control = api.control()
+	samples = []
+	timeouts = 0
+	base = await control.get(SET_KEY)
+	for i in range(iterations):
+		target = base + 1 + i
+		arrived = api.Promise()
+		def observer(value):
+			value == target and arrived._resolve(perf_counter())
+		api.apiValues.observe(SET_KEY, observer)
+		try:
+			start = perf_counter()
+			control.set({SET_KEY: target})
+			samples += [(await api.timeout(arrived, 1000) - start)*1000]
+		except TimeoutError:
+			timeouts += 1
+		finally:
+			api.apiValues.unobserve(SET_KEY, observer)
+	await control.set({SET_KEY: base})
+	return {'latency': summarise(samples), 'timeouts': timeouts}
+
+
+async def benchmarkSliderDrag(api, iterations):
+	control = api.control()
+	base = await control.get(SET_KEY)
+	frames = 60 #One second of dragging.
+	start = perf_counter()
+	promises = []
+	for frame in range(frames):
+		promises += [control.set({SET_KEY: base + 10*(frame+1)})]
+		await api.sleep(16)
+	await api.gather(*promises)
+	total = (perf_counter() - start)*1000
+	sent = wireCalls(promises)
+	await control.set({SET_KEY: base})
+	return {
+		'total': total,
+		'calls': frames,
+		'wireCalls': sent,
+		'coalescingRatio': frames / (sent or 1),
+		**callTimings(promises),
+	}
+
+
+BENCHMARKS = {
+	'sync': benchmarkSync,
+	'async': benchmarkAsync,
+	'chained': benchmarkChained,
+	'batched': benchmarkBatched,
+	'notify': benchmarkNotify,
+	'sliderDrag': benchmarkSliderDrag,
+}
+
+
+async def runBenchmarks(api, names, iterations):
+	results = {}
+	for name in names:
+		print(f'benchmark: {name}', file=sys.stderr)
+		results[name] = await BENCHMARKS[name](api, iterations)
+	return results
+
+
+
+#######################
+#    Test fixtures    #
+#######################
+
+def serveMocks():
+	"""Run the API mocks. Run in a subprocess, on the private bus.
+		
+		The mocks are imported without running chronosGui2/__init__.py,
+		since that imports the api, which can't start until the mocks
+		are up."""
+	from PyQt5.QtCore import QCoreApplication
+	package = types.ModuleType('chronosGui2')
+	package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+	sys.modules['chronosGui2'] = package
+	from chronosGui2 import control_api_mock, video_api_mock; control_api_mock, video_api_mock
+	
+	app = QCoreApplication(sys.argv[:1])
+	
+	print('ready', flush=True)
+	sys.stdout = open(os.devnull, 'w') #The mocks print a lot, and nobody's listening any more.
+	sys.exit(app.exec_())
+
+
+def startPrivateBus():
+	"""Start a dbus-daemon of our own, and the mocks on it. Returns the processes to stop afterwards."""
+	daemon = subprocess.Popen(
+		['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+		stdout=subprocess.PIPE, universal_newlines=True )
+	os.environ['DBUS_SYSTEM_BUS_ADDRESS'] = daemon.stdout.readline().strip()
+	
+	mocks = subprocess.Popen( #Run as a file, not with -m, which would import the chronosGui2 package. See serveMocks.
+		[sys.executable, os.path.abspath(__file__), '--serve-mocks'],
+		stdout=subprocess.PIPE, universal_newlines=True )
+	if mocks.stdout.readline().strip() != 'ready':
+		raise Exception("API mocks failed to start.")
+	
+	return [mocks, daemon]
+
+
+def startBurden(count: int):
+	"""Keep the CPU busy, like the notes on the old api_speed_test.py did with `yes`."""
+	return [
+		subprocess.Popen(['yes'], stdout=subprocess.DEVNULL)
+		for _ in range(count)
+	]
+
+
+def stop(processes):
+	for process in processes:
+		process.terminate()
+	for process in processes:
+		process.wait()
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the Chronos D-Bus API layer.")
+	parser.add_argument('--iterations', type=int, default=100,
+		help="Calls per benchmark.")
+	parser.add_argument('--burden', type=int, default=0,
+		help="Also run the benchmarks with this many CPU-burning processes going.")
+	parser.add_argument('--only', default=[], action='append', choices=list(BENCHMARKS),
+		help="Run only this benchmark. May be given more than once.")
+	parser.add_argument('--output', default='-',
+		help="Write results here, instead of stdout.")
+	parser.add_argument('--serve-mocks', default=False, action='store_true',
+		help=argparse.SUPPRESS) #Internal, used to run the mocks in a subprocess.
+	parsed = parser.parse_args()
+	
+	if parsed.serve_mocks:
+		return serveMocks()
+	
+	fixtures = startPrivateBus()
+	try:
+		os.environ['USE_CHRONOS_API_MOCK'] = 'external' #The mocks are running in their own process, don't start them again here.
+		from PyQt5.QtCore import QCoreApplication
+		app = QCoreApplication(sys.argv[:1])
+		import chronosGui2.api as api
+		
+		names = parsed.only or list(BENCHMARKS)
+		
+		async def run():
+			results = {'unladen': await runBenchmarks(api, names, parsed.iterations)}
+			if parsed.burden:
+				burden = startBurden(parsed.burden)
+				try:
+					results['laden'] = await runBenchmarks(api, names, parsed.iterations)
+				finally:
+					stop(burden)
+			return results
+		
+		report = {
+			'version': 1,
+			'date': datetime.now().isoformat(),
+			'host': platform.node(),
+			'python': platform.python_version(),
+			'iterations': parsed.iterations,
+			'burden': parsed.burden,
+		}
+		def done(results):
+			report['results'] = results
+			app.quit()
+		def failed(error):
+			report['error'] = repr(error)
+			app.exit(1)
+		api.spawn(run()).then(done).catch(failed)
+		exitCode = app.exec_()
+	finally:
+		stop(fixtures)
+	
+	output = json.dumps(report, indent='\t')
+	if parsed.output == '-':
+		print(output)
+	else:
+		with open(parsed.output, 'w') as file:
+			file.write(output + '\n')
+	
+	sys.exit(exitCode)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,154 @@
+# -*- coding: future_fstrings -*-
+
+"""Play back D-Bus traffic recorded with $CHRONOS_API_RECORD.
+
+	Stands in for the control and video APIs, as the mock services, so
+	the gui can be run against a real camera session on a machine with
+	no camera. Each call is answered with the reply recorded for it,
+	after the recorded latency, and the recorded notify and video
+	signals are emitted at the times they originally arrived.
+	
+	Usage:
+	On the camera, record a session:
+		CHRONOS_API_RECORD=session.jsonl.gz python3 -m chronosGui2
+	Then, on the dev box, replay it at half speed:
+		python3 -m chronosGui2.api_replay session.jsonl.gz --speed 0.5 &
+		USE_CHRONOS_API_MOCK=external python3 -m chronosGui2
+	
+	Remarks:
+	Replies are matched to calls by method and arguments, in the order
+	they were recorded. If the gui makes a call which wasn't recorded,
+	it gets the last reply recorded for that method instead, and failing
+	that an empty map. Like the mocks, we can't send D-Bus errors from
+	PyQt5, so recorded errors are replied to with {"error": message}.
+"""
+
+import sys
+import json, gzip
+import argparse
+from collections import defaultdict, deque
+from time import sleep
+
+from PyQt5.QtCore import pyqtSlot, QObject, QTimer, QCoreApplication
+from PyQt5.QtDBus import QDBusConnection, QDBusMessage
+
+import logging; log = logging.getLogger('Chronos.replay')
+
+#D-Bus signature PyQt5 should use for each type of argument or reply.
+QT_TYPES = {dict: 'QVariantMap', list: 'QVariantList', str: 'QString', bool: 'bool', int: 'int', float: 'double'}
+
+
+def load(path: str):
+	"""Read a recording. Returns the header and a list of entries."""
+	with (gzip.open if path.endswith('.gz') else open)(path, 'rt') as file:
+		header = json.loads(file.readline())
+		if header.get('version') != 1:
+			raise ValueError(f'{path} is version {header.get("version")} of the recording format, expected 1.')
+		return header, [json.loads(line) for line in file if line.strip()]
+
+
+class Session():
+	"""The recorded replies for one API, by method and arguments."""
+	
+	def __init__(self, entries, speed: float):
+		self.speed = speed
+		self._replies = defaultdict(deque) #(method, args as json): [entry, …]
+		self._lastReply = {} #method: entry
+		self.methods = {} #method: recorded call, for the slot signature
+		for entry in entries:
+			self._replies[entry['call'], json.dumps(entry['args'], sort_keys=True)].append(entry)
+			self.methods.setdefault(entry['call'], entry)
+	
+	def reply(self, method: str, args: list):
+		key = (method, json.dumps(args, sort_keys=True))
+		if self._replies[key]:
+			entry = self._replies[key].popleft()
+			self._lastReply[method] = entry
+		else:
+			log.info(f'{method}{tuple(args)} was not recorded, replaying the nearest reply.')
+			entry = self._lastReply.get(method) or next(
+				(replies[0] for (name, _), replies in self._replies.items() if name == method and replies),
+				{'ms': 0, 'reply': {}} )
+		
+		if self.speed:
+			sleep(entry['ms'] / 1000 / self.speed) #The daemons don't answer anything else while busy, either.
+		return {'error': entry['error']} if 'error' in entry else entry['reply']
+
+
+def replayService(api: str, session: Session):
+	"""Build a QObject with a D-Bus slot for each method recorded for api."""
+	def slot(method, argTypes, resultType):
+		@pyqtSlot(*argTypes, result=resultType)
+		def call(self, *args):
+			return session.reply(method, list(args))
+		call.__name__ = method
+		return call
+	
+	slots = {}
+	for method, entry in session.methods.items():
+		reply = entry.get('reply', {})
+		slots[method] = slot(
+			method,
+			[QT_TYPES.get(type(arg), 'QVariant') for arg in entry['args']],
+			QT_TYPES.get(type(reply), 'QVariant') if 'reply' in entry else 'QVariantMap',
+		)
+	return type(f'{api.title()}Replay', (QObject,), slots)()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Replay recorded Chronos D-Bus traffic.")
+	parser.add_argument('recording',
+		help="File recorded with $CHRONOS_API_RECORD")
+	parser.add_argument('--speed', type=float, default=1,
+		help="Playback speed. 2 plays twice as fast, 0 replies and signals immediately.")
+	parser.add_argument('--loop', default=False, action='store_true',
+		help="Start the signals over again when they've all been sent.")
+	parsed = parser.parse_args()
+	
+	logging.basicConfig(format='%(levelname)8s%(name)12s %(message)s', level=logging.INFO)
+	
+	app = QCoreApplication(sys.argv[:1])
+	bus = QDBusConnection.systemBus()
+	if not bus.isConnected():
+		print("Error: Can not connect to D-Bus. Is D-Bus itself running?", file=sys.stderr)
+		sys.exit(-1)
+	
+	header, entries = load(parsed.recording)
+	log.info(f"Replaying {len(entries)} events recorded {header.get('recorded', 'at an unknown time')}.")
+	
+	services = {}
+	for api in ('control', 'video'):
+		services[api] = replayService(api, Session(
+			[entry for entry in entries if entry['api'] == api and 'call' in entry],
+			parsed.speed,
+		))
+		if not bus.registerService(f'ca.krontech.chronos.{api}_mock'):
+			sys.stderr.write(f"Could not register {api} service: {bus.lastError().message() or '(no message)'}\n")
+			raise Exception("D-Bus Setup Error")
+		bus.registerObject(f'/ca/krontech/chronos/{api}_mock', services[api], QDBusConnection.ExportAllSlots)
+	
+	#Emit each signal at its recorded time. The timer is restarted for the next one as we go.
+	signals = [entry for entry in entries if 'signal' in entry]
+	pending = deque(signals)
+	def emitNext():
+		entry = pending.popleft()
+		signal = QDBusMessage.createSignal(f"/ca/krontech/chronos/{entry['api']}_mock", f"ca.krontech.chronos.{entry['api']}_mock", entry['signal'])
+		for arg in entry['args']:
+			signal << arg
+		bus.send(signal)
+		if not pending and parsed.loop:
+			pending.extend(signals)
+		scheduleNext(entry['t'])
+	def scheduleNext(now):
+		if pending:
+			signalTimer.start(max(0, int((pending[0]['t'] - now) / parsed.speed)) if parsed.speed else 0)
+	signalTimer = QTimer(app)
+	signalTimer.setSingleShot(True)
+	signalTimer.timeout.connect(emitNext)
+	scheduleNext(signals[0]['t'] if signals else 0)
+	
+	sys.exit(app.exec_())
+
+
+if __name__ == '__main__':
+	main()
@@ -8,17 +8,21 @@ See readme.md for more details.
 """
 
 # General imports
-import os, subprocess
+import os, sys, subprocess
+import importlib
 import time
+from collections import OrderedDict
 
 # QT-specific imports
 from PyQt5 import QtWidgets, QtCore, QtGui
 
 from chronosGui2.stats import report
+from chronosGui2 import metrics, startup_profile
 from chronosGui2.debugger import *; dbg #imported for occasional use debugging, ignore "unused" warning
 from chronosGui2 import settings
 from chronosGui2.widgets.focus_ring import FocusRing
 from chronosGui2.widgets.toaster_notification import ToasterNotificationQueue
+from chronosGui2.screen_precache import ScreenPrecache
 import logging
 
 #App performance settings
@@ -86,52 +90,40 @@ class Window(QtCore.QObject):
 		# Screen-loading functionality #
 		################################
 		
-		from .screens.main2 import Main
-		from .screens.play_and_save import PlayAndSave
-		from .screens.recording_settings import RecordingSettings
-		from .screens.storage import Storage
-		from .screens.color import Color
-		from .screens.about_camera import AboutCamera
-		from .screens.file_settings import FileSettings
-		from .screens.power import Power
-		from .screens.primary_settings import PrimarySettings
-		from .screens.record_mode import RecordMode
-		from .screens.remote_access import RemoteAccess
-		from .screens.replay import Replay
-		from .screens.scripts import Scripts
-		from .screens.service_screen import ServiceScreenLocked, ServiceScreenUnlocked
-		from .screens.stamp import Stamp
-		from .screens.test import Test
-		from .screens.trigger_delay import TriggerDelay
-		from .screens.triggers_and_io import TriggersAndIO
-		from .screens.update_firmware import UpdateFirmware
-		from .screens.user_settings import UserSettings
-		
-		self._availableScreens = {
-			'main': Main, #load order, load items on main screen first, main screen submenus next, and it doesn't really matter after that.
-			'play_and_save': PlayAndSave,
-			'recording_settings': RecordingSettings,
-			'about_camera': AboutCamera,
-			'color': Color,
-			'storage': Storage,
-			'file_settings': FileSettings,
-			'power': Power,
-			'primary_settings': PrimarySettings,
-			'record_mode': RecordMode,
-			'remote_access': RemoteAccess,
-			'replay': Replay,
-			'scripts': Scripts,
-			'service_screen.locked': ServiceScreenLocked,
-			'service_screen.unlocked': ServiceScreenUnlocked,
-			'stamp': Stamp,
-			'test': Test,
-			'trigger_delay': TriggerDelay,
-			'triggers_and_io': TriggersAndIO,
-			'update_firmware': UpdateFirmware,
-			'user_settings': UserSettings,
-		}
+		#Screens are imported when they're first needed, since importing a
+		#screen builds its generated form classes and often talks to the API.
+		#Starting up only has to pay for the first screen. The rest are
+		#imported by the precache, or when they're opened.
+		self._availableScreens = OrderedDict([
+			('main', 'main2:Main'), #load order, load items on main screen first, main screen submenus next, and it doesn't really matter after that.
+			('play_and_save', 'play_and_save:PlayAndSave'),
+			('recording_settings', 'recording_settings:RecordingSettings'),
+			('about_camera', 'about_camera:AboutCamera'),
+			('color', 'color:Color'),
+			('storage', 'storage:Storage'),
+			('file_settings', 'file_settings:FileSettings'),
+			('power', 'power:Power'),
+			('primary_settings', 'primary_settings:PrimarySettings'),
+			('record_mode', 'record_mode:RecordMode'),
+			('remote_access', 'remote_access:RemoteAccess'),
+			('replay', 'replay:Replay'),
+			('scripts', 'scripts:Scripts'),
+			('service_screen.locked', 'service_screen:ServiceScreenLocked'),
+			('service_screen.unlocked', 'service_screen:ServiceScreenUnlocked'),
+			('stamp', 'stamp:Stamp'),
+			('test', 'test:Test'),
+			('trigger_delay', 'trigger_delay:TriggerDelay'),
+			('triggers_and_io', 'triggers_and_io:TriggersAndIO'),
+			('update_firmware', 'update_firmware:UpdateFirmware'),
+			('user_settings', 'user_settings:UserSettings'),
+		]) #screen name: 'module in chronosGui2.screens:class'
 		
 		self._screens = {}
+		self._screensUnderConstruction = {} #screen name: generator building it, see _instantiationSteps
+		
+		#Screens not yet opened are built ahead of time, most likely first, when the user isn't busy. See screen_precache.py.
+		self.precache = ScreenPrecache(self, app)
+		self.precache.finished.connect(self._precacheFinished)
 		
 		# Set the initial screen. If in dev mode, due to the frequent restarts,
 		# reopen the previous screen. If in the hands of an end-user, always
@@ -162,10 +154,7 @@ class Window(QtCore.QObject):
 		settings.setValue('current screen', self.currentScreen)
 		
 		#Cache all screens, cached screens load about 150-200ms faster I think.
-		self._lazyLoadTimer = QtCore.QTimer()
-		self._lazyLoadTimer.timeout.connect(self._loadAScreen)
-		self._lazyLoadTimer.setSingleShot(True)
-		PRECACHE_ALL_SCREENS and self._lazyLoadTimer.start(0) #ms
+		PRECACHE_ALL_SCREENS and self.precache.start()
 		
 		
 		from chronosGui2.input_panels import KeyboardNumericWithUnits, KeyboardNumericWithoutUnits
@@ -179,58 +168,113 @@ class Window(QtCore.QObject):
 		self._activeKeyboard = ''
 		
 	def _ensureInstantiated(self, screenName: str):
-		"""Lazily load screens to shorten initial startup time."""
-		
-		if screenName in self._screens:
-			return
+		"""Lazily load screens to shorten initial startup time.
+			
+			If the screen has been partly built by the precache, this
+			finishes building it."""
 		
+		for _ in self._instantiationSteps(screenName):
+			pass
+	
+	def _instantiationSteps(self, screenName: str):
+		"""Return a generator which builds a screen, one step per next().
+			
+			The event loop can run between steps, so the precache can build a
+			screen without holding up input for the whole 150-200ms it takes.
+			A screen can split up its own construction by providing a
+			constructionSteps() generator, which is run after __init__; each
+			yield in it ends a step. Since observers can fire between steps,
+			whatever an earlier step sets up must work before the later steps
+			have run. (It already had to, since observers are called once when
+			they're registered.)
+			
+			A screen is only added to self._screens once it's done. Asking for
+			a partly-built screen returns the generator already building it,
+			so it carries on where it left off."""
 		
-		if screenName not in self._availableScreens:
-			raise ValueError(f"Unknown screen {screenName}.\nAvailable screens are: {self._availableScreens.keys()}")
+		if screenName in self._screens:
+			return iter(())
 		
+		if screenName not in self._screensUnderConstruction:
+			if screenName not in self._availableScreens:
+				raise ValueError(f"Unknown screen {screenName}.\nAvailable screens are: {self._availableScreens.keys()}")
+			self._screensUnderConstruction[screenName] = self._construct(screenName)
+		return self._screensUnderConstruction[screenName]
+	
+	def _construct(self, screenName: str):
 		guiLog.info(f'Loading {screenName} screen.')
-		perf_start_time = time.perf_counter()
-		
-		screen = self._screens[screenName] = self._availableScreens[screenName](self)
-		screen.app = self.app
-		
-		perfLog.info(f'screen load duration, {screenName}, {time.perf_counter() - perf_start_time}')
-		
-		# So, we want alpha blending, so we can have a drop-shadow for our
-		# keyboard. Great. Since we're not using a compositing window manager,
-		# we don't get that between windows. So we don't want put the keyboard
-		# in its own window. (We could hack something together where the
-		# shadow is in one window, and the keyboard in the other. This seems
-		# rather confusing to me.) So, what we're going to do is to move all
-		# the children of the loaded screen into a widget the size of the
-		# screen, and the keyboard into another. This gives us -conceptually-
-		# the same setup as in the old camApp, where keyboards were in a
-		# separate container.
-		
-		children = screen.children()
-		screenContents = QtWidgets.QWidget(screen)
-		for child in children:
-			child.setParent(screenContents)
-		screen.screenContents = screenContents
-		
-		# Finally, add the screen's notification toaster and focus ring. (Focus ring on top.)
-		screen.toaster = ToasterNotificationQueue(screen)
-		screen.focusRing = FocusRing(screen)
-		
-		perfLog.info(f'screen ready duration, {screenName}, {time.perf_counter() - perf_start_time}')
+		buildTime = 0 #s spent building the screen, not counting time spent between steps.
+		finished = object()
 		
+		try:
+			stepStart = time.perf_counter()
+			screenClass = self._screenClass(screenName) #Importing the screen is often a good chunk of the work, so it's a step of its own.
+			buildTime += time.perf_counter() - stepStart
+			yield
+			
+			stepStart = time.perf_counter()
+			with startup_profile.span(f'construct {screenName} screen', 'screen'):
+				screen = screenClass(self)
+			screen.app = self.app
+			steps = screen.constructionSteps() if hasattr(screen, 'constructionSteps') else iter(())
+			
+			while True:
+				buildTime += time.perf_counter() - stepStart
+				yield
+				stepStart = time.perf_counter()
+				with startup_profile.span(f'construct {screenName} screen, continued', 'screen'):
+					if next(steps, finished) is finished:
+						break
+			
+			perfLog.info(f'screen load duration, {screenName}, {buildTime + time.perf_counter() - stepStart}')
+			metrics.timing(f'screen.load.{screenName}', (buildTime + time.perf_counter() - stepStart)*1000)
+			
+			# So, we want alpha blending, so we can have a drop-shadow for our
+			# keyboard. Great. Since we're not using a compositing window manager,
+			# we don't get that between windows. So we don't want put the keyboard
+			# in its own window. (We could hack something together where the
+			# shadow is in one window, and the keyboard in the other. This seems
+			# rather confusing to me.) So, what we're going to do is to move all
+			# the children of the loaded screen into a widget the size of the
+			# screen, and the keyboard into another. This gives us -conceptually-
+			# the same setup as in the old camApp, where keyboards were in a
+			# separate container.
+			
+			children = screen.children()
+			screenContents = QtWidgets.QWidget(screen)
+			for child in children:
+				child.setParent(screenContents)
+			screen.screenContents = screenContents
+			
+			# Finally, add the screen's notification toaster and focus ring. (Focus ring on top.)
+			screen.toaster = ToasterNotificationQueue(screen)
+			screen.focusRing = FocusRing(screen)
+			
+			self._screens[screenName] = screen
+			buildTime += time.perf_counter() - stepStart
+			perfLog.info(f'screen ready duration, {screenName}, {buildTime}')
+			metrics.timing(f'screen.ready.{screenName}', buildTime*1000)
+			self.precache.recordBuildCost(screenName, buildTime*1000)
+		finally:
+			del self._screensUnderConstruction[screenName]
+		
+	def _screenClass(self, screenName: str):
+		"""Import the class for a screen."""
+		module, className = self._availableScreens[screenName].split(':')
+		if f'chronosGui2.screens.{module}' not in sys.modules:
+			importStartTime = time.perf_counter()
+			importlib.import_module(f'chronosGui2.screens.{module}')
+			perfLog.info(f'screen import duration, {screenName}, {time.perf_counter() - importStartTime}')
+			metrics.timing(f'screen.import.{screenName}', (time.perf_counter() - importStartTime)*1000)
+		return getattr(sys.modules[f'chronosGui2.screens.{module}'], className)
+	
 	def _uninstantiatedScreens(self):
 		"""Return (generator for) non-cached screens. (Those not in self._screens.)"""
 		return (screen for screen in self._availableScreens.keys() if screen not in self._screens.keys())
 		
-	def _loadAScreen(self):
-		screen = next(self._uninstantiatedScreens(), None)
-		if not screen:
-			self._lazyLoadTimer = None
-			report("screen_cache_time", {"seconds": time.perf_counter() - perf_start_time})
-		else:
-			self._ensureInstantiated(screen)
-			self._lazyLoadTimer.start(200)
+	def _precacheFinished(self):
+		report("screen_cache_time", {"seconds": time.perf_counter() - perf_start_time})
+		metrics.timing('screenCache', (time.perf_counter() - perf_start_time)*1000)
 	
 	def show(self, screen):
 		"""Switch between the screens of the back-of-camera interface.
@@ -255,6 +299,7 @@ class Window(QtCore.QObject):
 			return dbg() #This gets stubbed out in production, so it doesn't actually freeze the app.
 		
 		report("screen_transition", {"new": screen, "old": self.currentScreen})
+		transitionStart = time.perf_counter()
 		
 		#If you loop through to a screen again, which can easily happen because we don't always use window.back() to return from screens, discard the loop to keep history from growing forever.
 		self._screenStack += [screen]
@@ -273,8 +318,10 @@ class Window(QtCore.QObject):
 			self.hideInput()
 			
 			#Only set the setting value after everything has worked, to avoid trying to load a crashing screen.
+			self.precache.recordTransition(self.currentScreen, screen)
 			self.currentScreen = screen
 			settings.setValue('current screen', screen)
+			metrics.timing('screen.transition', (time.perf_counter() - transitionStart)*1000)
 			
 			#print(f'current breadcrumb: {self._screenStack}')
 		except Exception as e:
@@ -477,6 +524,10 @@ def connectHardwareEvents(app, hardware):
 			if jogWheelLongClickTimer.isActive():
 				jogWheelLongClickTimer.stop()
 	
+	#Hold off building screens in the background while the hardware's being used. (Touch input is watched for by the precache itself.)
+	for event in ('jogWheelDown', 'jogWheelUp', 'jogWheelHighResolutionRotation', 'jogWheelLowResolutionRotation', 'recordButtonDown', 'recordButtonUp'):
+		hardware.subscribe(event, lambda *_: app.window.precache.userActive())
+	
 	hardware.subscribe('jogWheelDown', startPress)
 	hardware.subscribe('jogWheelDown', lambda: app.focusWidget().jogWheelDown.emit())
 	hardware.subscribe('jogWheelUp', lambda: app.focusWidget().jogWheelUp.emit())
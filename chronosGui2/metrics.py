@@ -0,0 +1,279 @@
+#!/usr/bin/python3
+# -*- coding: future_fstrings -*-
+"""Record performance metrics on the camera, and summarise them.
+
+	Counters and histograms are kept in memory, and a worker thread appends
+	them to the metrics file every so often, one line per interval. The
+	file is rotated when it gets big, so the last few hundred runs are
+	kept. Nothing leaves the camera, so this works without a network.
+	
+	Usage:
+		from chronosGui2 import metrics
+		metrics.count('api.slowCalls')
+		metrics.timing('screen.load.main', ms)
+		with metrics.timer('screen.transition'):
+			…
+	
+	To see how the last few runs went, run on the camera:
+		python3 chronosGui2/metrics.py [--runs 10] [--file metrics.jsonl]
+	Run this file directly, not with -m, since importing the chronosGui2
+	package connects to the camera's API. Nothing from the package is
+	imported here, so summarising doesn't start any of the gui.
+	
+	File format:
+		Each line is the metrics recorded in one interval of one run:
+			{"run": 1571180000, "t": 1571180030, "c": {"api.slowCalls": 2}, "h": {"startup": {"s": 4210.5, "b": {"49": 1}}}}
+		run is when the gui started, in seconds since the epoch. c is
+		counters. h is histograms, with the sum s and the bucketed counts
+		b. A value v goes in bucket ceil(log2(v)*4), so each bucket is
+		about 19% wider than the last; percentiles are reported as the
+		top of their bucket.
+"""
+
+import sys, os
+import json
+import math
+import time
+import atexit
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from collections import defaultdict, Counter, OrderedDict
+from typing import Dict
+import logging; log = logging.getLogger('Chronos.perf')
+
+metrics_path = os.environ.get('CHRONOS_METRICS_FILE', os.path.expanduser('~/.local/share/chronos-gui2/metrics.jsonl'))
+flush_interval = 30 #s, between writes to the metrics file.
+rotate_bytes = 256*1024 #Start a new metrics file past this size.
+rotate_keep = 3 #Old metrics files kept, as metrics.jsonl.1 to .3.
+buckets_per_doubling = 4
+
+run = int(time.time())
+_lock = threading.Lock() #Metrics are recorded on the GUI thread, and written on the worker thread.
+_counters = Counter() #name: count
+_histograms = {} #name: [sum, Counter(bucket: count)]
+_worker = None
+
+
+def count(name: str, n: int = 1):
+	"""Add n to a counter."""
+	with _lock:
+		_counters[name] += n
+	_worker or _start()
+
+def histogram(name: str, value: float):
+	"""Record one value, such as a time in ms, in a histogram."""
+	bucket = math.ceil(math.log2(value) * buckets_per_doubling) if value > 0 else -1000
+	with _lock:
+		entry = _histograms.get(name)
+		if not entry:
+			entry = _histograms[name] = [0, Counter()]
+		entry[0] += value
+		entry[1][bucket] += 1
+	_worker or _start()
+
+timing = histogram #Times are in ms, by convention.
+
+@contextmanager
+def timer(name: str):
+	"""Record the time the with block takes, in ms."""
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		timing(name, (time.perf_counter() - start)*1000)
+
+
+def _start():
+	global _worker
+	with _lock:
+		if _worker:
+			return
+		_worker = threading.Thread(target=_run, name='metrics writer', daemon=True)
+	_worker.start()
+
+def _run():
+	while True:
+		time.sleep(flush_interval)
+		flush()
+
+@atexit.register
+def flush():
+	"""Write the metrics recorded since the last flush to the metrics file."""
+	global _counters, _histograms
+	with _lock:
+		counters, histograms = _counters, _histograms
+		_counters, _histograms = Counter(), {}
+	if not counters and not histograms:
+		return
+	
+	line = json.dumps({
+		'run': run,
+		't': int(time.time()),
+		'c': counters,
+		'h': {name: {'s': round(total, 3), 'b': buckets} for name, (total, buckets) in histograms.items()},
+	}, separators=(',', ':'))
+	
+	try:
+		os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
+		if os.path.exists(metrics_path) and os.path.getsize(metrics_path) > rotate_bytes:
+			for generation in reversed(range(1, rotate_keep)):
+				if os.path.exists(f'{metrics_path}.{generation}'):
+					os.replace(f'{metrics_path}.{generation}', f'{metrics_path}.{generation+1}')
+			os.replace(metrics_path, f'{metrics_path}.1')
+		with open(metrics_path, 'a') as file:
+			file.write(line + '\n')
+	except OSError as e:
+		log.warn(f'Could not write metrics to {metrics_path}. ({e})')
+
+
+
+#####################
+#    Summarising    #
+#####################
+
+def load(path: str = None) -> Dict[int, dict]:
+	"""Read the metrics file and its rotated predecessors.
+		
+		Returns {run: {'counters': Counter, 'histograms': {name: Histogram}}},
+		oldest run first."""
+	path = path or metrics_path
+	runs = {}
+	for filename in [f'{path}.{generation}' for generation in reversed(range(1, rotate_keep+1))] + [path]:
+		try:
+			file = open(filename)
+		except FileNotFoundError:
+			continue
+		with file:
+			for line in file:
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					continue #Probably cut off by a power loss.
+				metrics = runs.setdefault(entry['run'], {'counters': Counter(), 'histograms': defaultdict(Histogram)})
+				metrics['counters'].update(entry['c'])
+				for name, histogram in entry['h'].items():
+					metrics['histograms'][name].add(histogram['s'], histogram['b'])
+	return OrderedDict(sorted(runs.items()))
+
+
+class Histogram():
+	"""A histogram read back from the metrics file, which can be merged with others."""
+	
+	def __init__(self):
+		self.sum = 0
+		self.buckets = Counter()
+	
+	def add(self, total: float, buckets: Dict[str, int]):
+		self.sum += total
+		self.buckets.update({int(bucket): n for bucket, n in buckets.items()})
+	
+	def merge(self, other: 'Histogram'):
+		self.add(other.sum, other.buckets)
+		return self
+	
+	def __len__(self):
+		return sum(self.buckets.values())
+	
+	def mean(self):
+		return self.sum / (len(self) or 1)
+	
+	def percentile(self, percentile: int) -> float:
+		"""Return the top of the bucket the percentile falls in."""
+		rank = math.ceil(len(self) * percentile / 100)
+		seen = 0
+		for bucket in sorted(self.buckets):
+			seen += self.buckets[bucket]
+			if seen >= rank:
+				return 2 ** (bucket / buckets_per_doubling) if bucket > -1000 else 0
+		return float('nan')
+
+
+def describe(histogram: Histogram, scale: float = 1) -> str:
+	"""Format a histogram as n, and p50/p90/p99 divided by scale."""
+	if not histogram:
+		return '-'
+	digits = 0 if scale == 1 else 2
+	values = '/'.join(f'{histogram.percentile(p)/scale:0.{digits}f}' for p in (50, 90, 99))
+	return f'{values} ({len(histogram)})'
+
+def merged(runs, prefix: str) -> Histogram:
+	"""Merge every histogram starting with prefix, across all runs."""
+	total = Histogram()
+	for metrics in runs:
+		for name, histogram in metrics['histograms'].items():
+			if name.startswith(prefix):
+				total.merge(histogram)
+	return total
+
+
+def summarise(runs: Dict[int, dict], slowest: int) -> str:
+	lines = [
+		f"{'run':<19}  {'startup s':>9}  {'cache s':>7}  {'transition ms p50/p90/p99 (n)':>30}  {'api call ms p50/p90/p99 (n)':>28}  {'slow calls':>10}",
+	]
+	for started, metrics in runs.items():
+		histograms = metrics['histograms']
+		lines += [
+			f"{datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M:%S'):<19}  "
+			f"{histograms['startup'].mean()/1000 if 'startup' in histograms else float('nan'):>9.2f}  "
+			f"{histograms['screenCache'].mean()/1000 if 'screenCache' in histograms else float('nan'):>7.2f}  "
+			f"{describe(histograms.get('screen.transition')):>30}  "
+			f"{describe(merged([metrics], 'api.call.')):>28}  "
+			f"{metrics['counters']['api.slowCalls']:>10}"
+		]
+	
+	runs = list(runs.values())
+	lines += [
+		'',
+		f"all runs: startup s {describe(merged(runs, 'startup'), 1000)}, "
+		f"cache s {describe(merged(runs, 'screenCache'), 1000)}, "
+		f"transition ms {describe(merged(runs, 'screen.transition'))}",
+		'',
+		"slowest api calls, ms p50/p90/p99 (n), over all runs:",
+	]
+	calls = {name for metrics in runs for name in metrics['histograms'] if name.startswith('api.call.')}
+	calls = {name[len('api.call.'):]: merged(runs, name) for name in calls}
+	for name in sorted(calls, key=lambda name: -calls[name].percentile(99))[:slowest]:
+		lines += [f"\t{name:<40} {describe(calls[name])}"]
+	
+	return '\n'.join(lines)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Summarise the performance metrics recorded by the Chronos gui.")
+	parser.add_argument('--file', default=metrics_path,
+		help=f"Metrics file to read. Rotated files next to it are read too. (default {metrics_path})")
+	parser.add_argument('--runs', type=int, default=10,
+		help="Number of recent runs of the gui to list.")
+	parser.add_argument('--slowest', type=int, default=10,
+		help="Number of api calls to list.")
+	parser.add_argument('--json', default=False, action='store_true',
+		help="Print every metric of every run as JSON, instead.")
+	parsed = parser.parse_args()
+	
+	if 'chronosGui2.metrics' in sys.modules: #Run with -m, so the api was started, and recorded metrics of its own. They aren't from a run of the gui, so don't save them.
+		atexit.unregister(sys.modules['chronosGui2.metrics'].flush)
+	
+	runs = load(parsed.file)
+	if not runs:
+		print(f"No metrics recorded in {parsed.file}.", file=sys.stderr)
+		sys.exit(1)
+	runs = OrderedDict(list(runs.items())[-parsed.runs:])
+	
+	if parsed.json:
+		print(json.dumps(OrderedDict(
+			(run, {
+				'counters': metrics['counters'],
+				'histograms': {
+					name: {'n': len(histogram), 'mean': histogram.mean(), **{f'p{p}': histogram.percentile(p) for p in (50, 90, 99)}}
+					for name, histogram in metrics['histograms'].items()
+				},
+			}) for run, metrics in runs.items()
+		), indent='\t'))
+	else:
+		print(summarise(runs, parsed.slowest))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,147 @@
+# -*- coding: future_fstrings -*-
+"""Build screens before they're opened, while the user isn't doing anything.
+
+	Screens take 150-200ms to build, which is a long hitch if it lands while
+	someone is dragging a slider or spinning the jog wheel. So, we wait for
+	a lull in input before building a screen, and build the screen the user
+	is most likely to open next first. Screens are built a step at a time
+	(see Window._instantiationSteps), so input which arrives mid-build
+	waits for one step at most, and pauses the build until the next lull.
+	
+	Likelihood comes from the screen transitions seen before, which are kept
+	in settings between runs. A screen which is often opened from the
+	current screen comes first, then screens which are often opened at all,
+	then the rest in the order Window lists them.
+	
+	How long each screen took to build is kept in settings too, as
+	'screen build costs', and logged on Chronos.perf once everything is
+	cached, so the precache order can be tuned. (Equally-likely screens are
+	built cheapest-first, so the most screens are ready soonest. Screens
+	which haven't been measured yet come after those which have.)
+	
+	Transitions and build costs are counted in memory, and saved to
+	settings once everything is cached, and again when we exit.
+"""
+
+import time
+import atexit
+import logging
+
+from PyQt5 import QtCore
+
+from chronosGui2 import settings
+
+perfLog = logging.getLogger('Chronos.perf')
+
+IDLE_DELAY = 1500 #ms without input before we build a screen.
+BUILD_GAP = 50 #ms between screens while idle, so input is never stuck behind two builds in a row.
+STEP_GAP = 0 #ms between the steps of building a screen. Zero still lets waiting input through first.
+
+_inputEvents = frozenset({ #Any of these mean the user is doing something.
+	QtCore.QEvent.MouseButtonPress, QtCore.QEvent.MouseButtonRelease, QtCore.QEvent.MouseMove,
+	QtCore.QEvent.TouchBegin, QtCore.QEvent.TouchUpdate, QtCore.QEvent.TouchEnd,
+	QtCore.QEvent.KeyPress, QtCore.QEvent.KeyRelease, QtCore.QEvent.Wheel,
+})
+
+
+class ScreenPrecache(QtCore.QObject):
+	"""Schedule building the screens of a Window during idle time.
+		
+		Call userActive() for input which doesn't come through Qt, such as
+		the jog wheel. Touch, mouse and keyboard input is watched for with
+		an event filter on the app while there are screens left to build."""
+	
+	finished = QtCore.pyqtSignal() #Every screen has been built.
+	
+	def __init__(self, window, app):
+		super().__init__()
+		self._window = window
+		self._app = app
+		
+		self.transitions = settings.value('screen transitions', {}) #old screen: {new screen: count}
+		self.buildCosts = settings.value('screen build costs', {}) #screen: ms, as last measured
+		atexit.register(self.save)
+		
+		self._lastInput = time.perf_counter()
+		self._started = False
+		self._timer = QtCore.QTimer()
+		self._timer.setSingleShot(True)
+		self._timer.timeout.connect(self._buildNext)
+	
+	def start(self):
+		"""Start building the screens which haven't been built yet, as the user allows."""
+		if self._started:
+			return
+		self._started = True
+		self._app.installEventFilter(self)
+		self._timer.start(IDLE_DELAY)
+	
+	def stop(self):
+		self._timer.stop()
+		self._app.removeEventFilter(self)
+	
+	def eventFilter(self, obj, event):
+		if event.type() in _inputEvents:
+			self._lastInput = time.perf_counter()
+		return False
+	
+	def userActive(self):
+		"""Note user input which doesn't come through Qt, to hold off building screens."""
+		self._lastInput = time.perf_counter()
+	
+	
+	def recordTransition(self, old: str, new: str):
+		"""Count a screen transition, to rank screens by."""
+		self.transitions.setdefault(old, {})
+		self.transitions[old][new] = self.transitions[old].get(new, 0) + 1
+	
+	def recordBuildCost(self, screen: str, ms: float):
+		self.buildCosts[screen] = round(ms, 1)
+	
+	def save(self):
+		"""Save the transitions and build costs counted so far to settings."""
+		settings.setValue('screen transitions', self.transitions)
+		settings.setValue('screen build costs', self.buildCosts)
+	
+	def ranked(self) -> list:
+		"""Return the screens yet to be built, most likely to be opened next first."""
+		current = self._window.currentScreen
+		fromCurrent = self.transitions.get(current, {})
+		fromAnywhere = {}
+		for counts in self.transitions.values():
+			for screen, count in counts.items():
+				fromAnywhere[screen] = fromAnywhere.get(screen, 0) + count
+		order = {screen: index for index, screen in enumerate(self._window._availableScreens)}
+		
+		return sorted(self._window._uninstantiatedScreens(), key=lambda screen: (
+			-fromCurrent.get(screen, 0),
+			-fromAnywhere.get(screen, 0),
+			self.buildCosts.get(screen, float('inf')), #Unmeasured screens go after measured ones.
+			order[screen], #Then Window's order.
+		))
+	
+	
+	def _buildNext(self):
+		idleFor = (time.perf_counter() - self._lastInput)*1000 #ms
+		if idleFor < IDLE_DELAY:
+			self._timer.start(int(IDLE_DELAY - idleFor)) #Wait out the rest of the lull.
+			return
+		
+		#Finish a screen we've started before starting another, even if it's no longer the most likely.
+		screens = list(self._window._screensUnderConstruction) or self.ranked()
+		if not screens:
+			self._finished()
+			return
+		
+		done = object()
+		if next(self._window._instantiationSteps(screens[0]), done) is done:
+			self._timer.start(BUILD_GAP)
+		else:
+			self._timer.start(STEP_GAP)
+	
+	def _finished(self):
+		self.stop()
+		self.save()
+		perfLog.info('screen build costs, ms: ' + ', '.join(
+			f'{screen} {ms}' for screen, ms in sorted(self.buildCosts.items(), key=lambda item: -item[1]) ))
+		self.finished.emit()
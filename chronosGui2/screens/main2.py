@@ -9,7 +9,7 @@ from glob import iglob
 
 from PyQt5 import QtCore
 from PyQt5.QtCore import QPoint, QSize, Qt
-from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtWidgets import QWidget, QApplication, QLabel
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QStandardItemModel, QPainterPath, QPolygonF
 
 import chronosGui2.api as api
@@ -36,7 +36,13 @@ class Main(QWidget, Ui_Main2):
 	
 	def __init__(self, window):
 		super().__init__()
+		self._window = window
+	
+	def constructionSteps(self):
+		"""Build the screen, yielding to the event loop now and then. See Window._instantiationSteps."""
+		window = self._window
 		self.setupUi(self)
+		yield
 		
 		# API init.
 		self.control = api.control()
@@ -47,8 +53,6 @@ class Main(QWidget, Ui_Main2):
 		self.setWindowFlags(QtCore.Qt.FramelessWindowHint)
 		self.setAttribute(QtCore.Qt.WA_TranslucentBackground, True)
 		
-		self._window = window
-		
 		#Hide the fake borders if the buttons don't have borders.
 		if self.uiBlackCal.hideBorder:
 			self.uiBottomHorizontalLine.hide()
@@ -88,11 +92,11 @@ class Main(QWidget, Ui_Main2):
 				self.uiRecord.update()
 		api.observe('state', updateRecordingStartTime)
 		
-		totalFrames = self.control.getSync('totalFrames')
+		totalFrames = api.apiValues.get('totalFrames')
 		if totalFrames == 0: #Set the length of the recording to 0, if nothing has been recorded. Otherwise, calculate what we've recorded.
 			recordingStartTime = recordingEndTime
 		else:
-			recordingEndTime = recordingStartTime + totalFrames/self.control.getSync('frameRate')
+			recordingEndTime = recordingStartTime + totalFrames/api.apiValues.get('frameRate')
 		
 		self.uiMenuBackground.hide()
 		self.uiMenuBackground.move(0,0)
@@ -129,6 +133,7 @@ class Main(QWidget, Ui_Main2):
 		self.uiMenuBackground.mousePressEvent = hideMenu
 		self.uiMenuBackground.focusInEvent = hideMenu
 		
+		yield
 		
 		#############################
 		#   Button action binding   #
@@ -149,6 +154,23 @@ class Main(QWidget, Ui_Main2):
 			self.uiDebugD.show() if show else self.uiDebugD.hide(),
 		))
 		
+		#Debug overlay of the slowest API calls, to tell if stutter is the camera's fault or ours.
+		self.uiCallStats = QLabel(self)
+		self.uiCallStats.setAttribute(Qt.WA_TransparentForMouseEvents)
+		self.uiCallStats.setStyleSheet('background: rgba(0,0,0,0.6); color: white; font-family: monospace; font-size: 9px; padding: 2px;')
+		self.uiCallStats.move(10, 10)
+		self.uiCallStats.hide()
+		def updateCallStats():
+			self.uiCallStats.setText(api.callStats.dump(limit=8))
+			self.uiCallStats.adjustSize()
+		self._callStatsTimer = QtCore.QTimer(self)
+		self._callStatsTimer.timeout.connect(updateCallStats)
+		self._callStatsTimer.setInterval(1000)
+		settings.observe('debug controls enabled', False, lambda show: (
+			self.uiCallStats.show() if show else self.uiCallStats.hide(),
+			self._callStatsTimer.start() if show else self._callStatsTimer.stop(),
+		))
+		
 		
 		#Occasionally, the touch screen seems to report a spurious touch event on the top-right corner. This should prevent that. (Since the record button is there now, this is actually very important!)
 		self.uiErrantClickCatcher.mousePressEvent = (lambda evt:
@@ -316,6 +338,7 @@ class Main(QWidget, Ui_Main2):
 			self.control.set('wbTemperature', self.uiWBPreset5.property('temp')) )
 		self.uiFineTuneColor.clicked.connect(lambda: window.show('color'))
 		
+		yield
 		
 		#Exposure
 		def updateExposureSliderLimits():
@@ -356,9 +379,10 @@ class Main(QWidget, Ui_Main2):
 		exposureNsMin = 0
 		exposureNs = 0
 		exposureNsMax = 0
+		framePeriodNs = 1
 		
 		def updateExposureText(*_):
-			exposureDeg = exposureNs/api.apiValues.get('framePeriod')*360
+			exposureDeg = exposureNs/framePeriodNs*360
 			exposurePct = exposureNs/(exposureNsMax or 1)*100
 			exposureMs = exposureNs/1e3
 			
@@ -401,26 +425,14 @@ class Main(QWidget, Ui_Main2):
 				self.uiExposureSlider.setValue(exponentialRatio * (self.uiExposureSlider.maximum()-self.uiExposureSlider.minimum()) + self.uiExposureSlider.minimum())
 			updateExposureSliderLimits()
 		
-		# In Python 3.7: Use api.observe('exposureMin', lambda ns: exposureNSMin := ns) and give exposureNSMin a setter?
-		def updateExposureNsMin(ns):
-			nonlocal exposureNsMin
-			exposureNsMin = ns
+		#These all change together when the resolution changes, so only update the text once for them.
+		def updateExposureNs(*values):
+			nonlocal exposureNsMin, exposureNs, exposureNsMax, framePeriodNs
+			exposureNsMin, exposureNs, exposureNsMax, framePeriodNs = values
 			updateExposureText()
-		api.observe('exposureMin', updateExposureNsMin)
-		
-		def updateExposureNs(ns):
-			nonlocal exposureNs
-			exposureNs = ns
-			updateExposureText()
-		api.observe('exposurePeriod', updateExposureNs)
-		
-		def updateExposureNsMax(ns):
-			nonlocal exposureNsMax
-			exposureNsMax = ns
-			updateExposureText()
-		api.observe('exposureMax', updateExposureNsMax)
-		
-		api.observe('framePeriod', updateExposureText)
+		api.observe_all(
+			['exposureMin', 'exposurePeriod', 'exposureMax', 'framePeriod'],
+			updateExposureNs )
 		
 		self.uiExposureMenu.hide()
 		self.uiExposureMenu.move(
@@ -486,6 +498,7 @@ class Main(QWidget, Ui_Main2):
 		
 		
 		
+		yield
 		
 		#Resolution
 		resolutionTemplate = self.uiResolution.text()
@@ -515,6 +528,7 @@ class Main(QWidget, Ui_Main2):
 		self.uiResolution.clicked.connect(lambda:
 			window.show('recording_settings') )
 		
+		yield
 		
 		#Menu
 		self.uiMenuDropdown.hide()
@@ -601,6 +615,7 @@ class Main(QWidget, Ui_Main2):
 		
 		self.uiMenuFilterX.clicked.connect(self.uiMenuFilter.clear)
 		
+		yield
 		
 		#Battery
 		self._batteryCharge   = 1
@@ -690,6 +705,7 @@ class Main(QWidget, Ui_Main2):
 			type(self.uiBatteryIcon).paintEvent(self.uiBatteryIcon, evt) #Invoke the superclass to paint the battery overlay image on our new rect.
 		self.uiBatteryIcon.paintEvent = uiBatteryIconPaintEvent
 		
+		yield
 		
 		#Record / stop
 		self.uiRecordTemplateWithTime = self.uiRecord.text()
@@ -751,10 +767,8 @@ class Main(QWidget, Ui_Main2):
 		uiPlayAndSaveTemplate = self.uiPlayAndSave.text()
 		self.uiPlayAndSave.setText("Play && Save\n-1s RAM\n-1s Avail.")
 		
-		playAndSaveData = self.control.getSync(['cameraMaxFrames', 'frameRate', 'recSegments'])
+		segmentMaxRecTime = 0
 		def updatePlayAndSaveText(*_):
-			data = playAndSaveData
-			segmentMaxRecTime = data['cameraMaxFrames'] / data['frameRate'] / data['recSegments']
 			segmentCurrentRecTime = min(
 				segmentMaxRecTime, 
 				(recordingEndTime or time()) - recordingStartTime
@@ -762,22 +776,16 @@ class Main(QWidget, Ui_Main2):
 			self.uiPlayAndSave.setText(
 				uiPlayAndSaveTemplate.format(
 					ramUsed=segmentCurrentRecTime, ramTotal=segmentMaxRecTime ) )
-		updatePlayAndSaveText()
-			
-		def updatePlayAndSaveDataMaxFrames(value):
-			playAndSaveData['cameraMaxFrames'] = value
-		api.observe_future_only('cameraMaxFrames', updatePlayAndSaveDataMaxFrames)
-		api.observe_future_only('cameraMaxFrames', updatePlayAndSaveText)
-		
-		def updatePlayAndSaveDataFrameRate(_):
-			playAndSaveData['frameRate'] = self.control.getSync('frameRate')
-		api.observe_future_only('framePeriod', updatePlayAndSaveDataFrameRate)
-		api.observe_future_only('framePeriod', updatePlayAndSaveText)
 		
-		def updatePlayAndSaveDataRecSegments(value):
-			playAndSaveData['recSegments'] = value
-		api.observe_future_only('recSegments', updatePlayAndSaveDataRecSegments)
-		api.observe_future_only('recSegments', updatePlayAndSaveText)
+		def updateSegmentMaxRecTime(seconds):
+			nonlocal segmentMaxRecTime
+			segmentMaxRecTime = seconds
+			updatePlayAndSaveText()
+		api.observe(
+			api.computed(
+				['cameraMaxFrames', 'framePeriod', 'recSegments'],
+				lambda frames, framePeriodNs, segments: frames * framePeriodNs/1e9 / segments ),
+			updateSegmentMaxRecTime )
 		
 		def uiPlayAndSaveDraw(evt):
 			type(self.uiPlayAndSave).paintEvent(self.uiPlayAndSave, evt)
@@ -787,6 +795,7 @@ class Main(QWidget, Ui_Main2):
 		self.uiPlayAndSave.clicked.connect(lambda:
 			window.show('play_and_save')) #This should prompt to record if no footage is recorded, and explain itself.
 		
+		yield
 		
 		#Storage media
 		uiExternalMediaTemplate = self.uiExternalMedia.text()
@@ -889,7 +898,7 @@ class Main(QWidget, Ui_Main2):
 	
 	
 	def onShow(self):
-		self.updateBatteryCharge2(self.control.getSync('batteryChargeNormalized'))
+		self.control.get('batteryChargeNormalized').then(self.updateBatteryCharge2)
 		self._batteryPollTimer.start()
 		
 		self.updateExternalMediaText()
@@ -947,8 +956,7 @@ class Main(QWidget, Ui_Main2):
 	
 	
 	def updateBatteryCharge(self):
-		self.control.get('batteryChargeNormalized').then(
-			self.updateBatteryCharge2 )
+		self.updateBatteryCharge2(api.apiValues.get('batteryChargeNormalized'))
 	def updateBatteryCharge2(self, charge):
 		powerDownLevel = api.apiValues.get('powerOffWhenMainsLost') * self.uiPowerDownThreshold
 		warningLevel = powerDownLevel + 0.15
@@ -1041,7 +1049,7 @@ class Main(QWidget, Ui_Main2):
 		elif RECORDING_MODE == RECORDING_MODES['VIRTUAL_TRIGGER']:
 			virtuals = settings.value('virtually triggered actions', {})
 			if virtuals:
-				self.control.setSync('ioMapping', dump('new io mapping', {
+				self.control.set('ioMapping', dump('new io mapping', {
 					action: { 
 						'source': 'alwaysHigh' if state else 'none',
 						'invert': config['invert'],
@@ -1078,14 +1086,14 @@ class Main(QWidget, Ui_Main2):
 	def startRecording(self):
 		self.uiRecord.isRecording = False
 		self.uiRecord.update()
-		self.control.callSync('startRecording', {})
+		self.control.call('startRecording', {})
 	
 	def stopRecording(self):
 		self.uiRecord.isRecording = True
 		self.uiRecord.update()
 		self.uiRecord.setText(
 			self.uiRecordTemplateNoTime.format(state='Record') )
-		self.control.callSync('stopRecording')
+		self.control.call('stopRecording')
 	
 	
 	def showOptionOnTap(self, pos: QtCore.QModelIndex):
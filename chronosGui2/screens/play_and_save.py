@@ -49,10 +49,16 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 	
 	def __init__(self, window):
 		super().__init__()
+		self._window = window
+	
+	def constructionSteps(self):
+		"""Build the screen, yielding to the event loop now and then. See Window._instantiationSteps."""
+		window = self._window
 		self.setupUi(self)
+		yield
+		
 		self.video = api.video()
 		self.control = api.control()
-		self._window = window
 		
 		self.recordedSegments = []
 		self.totalRecordedFrames = 0
@@ -106,7 +112,7 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 		self.labelUpdateIdleDelayTimer.setInterval(32)
 		self.labelUpdateIdleDelayTimer.setSingleShot(True)
 		self.labelUpdateTimer = QtCore.QTimer()
-		self.labelUpdateTimer.setInterval(32) #ms, cap at 60fps. (Technically this is just a penalty, we need to *race* the timer and the dbus call but we can't easily do that because we need something like .~*Promise.all()*~. for that and it's a bit of a pain in the neck to construct right now.)
+		self.labelUpdateTimer.setInterval(0) #ms. The 32ms (~30fps) cap is raced against the status call below, so a slow call doesn't add to it.
 		self.labelUpdateTimer.setSingleShot(True) #Start the timer again after the update.
 		lastKnownFrame = -1
 		lastKnownFilesaveStatus = False
@@ -161,7 +167,8 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 				self.labelUpdateIdleDelayTimer.start()
 		self.labelUpdateIdleDelayTimer.timeout.connect(checkLastKnownFrame)
 		self.labelUpdateTimer.timeout.connect(lambda: #Now, the timer is not running, so we can't just stop it to stop this process. We may be waiting on the dbus call instead.
-			self.video.call('status').then(checkLastKnownFrame) )
+			api.gather(self.video.call('status'), api.sleep(32)).then(lambda results:
+				checkLastKnownFrame(results[0]) ) )
 		
 		self.uiCurrentFrame.suffixFormatString = self.uiCurrentFrame.suffix()
 		self.uiCurrentFrame.valueChanged.connect(lambda f: 
@@ -230,6 +237,7 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 		self.motionHeatmap = QImage() #Updated by updateMotionHeatmap, used by self.paintMotionHeatmap.
 		self.uiTimelineVisualization.paintEvent = self.paintMotionHeatmap
 		self.uiTimelineVisualization.hide() #Heatmap got delayed. Hide for now, some logic still depends on it.
+		yield
 		
 		#Set up for marked regions.
 		self._tracks = [] #Used as cache for updateMarkedRegions / paintMarkedRegions.
@@ -263,7 +271,7 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 		api.observe('videoState', self.onVideoStateChangeAlways)
 		api.observe('state', self.onStateChangeAlways)
 		
-		api.signal.observe('sof', self.onSOF)
+		api.signal.observe('sof', self.onSOF) #Not deferred. A deferred onSOF could run after an immediate onEOF, and leave us showing a save in progress.
 		api.signal.observe('eof', self.onEOF)
 		
 	def onShow(self):
@@ -320,12 +328,9 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 	
 	
 	def updateBattery(self):
-		self.control.call(
-			'get', ['batteryChargePercent']
-		).then(lambda data:
-			self.uiBatteryReadout.setText(
-				self.uiBatteryReadout.formatString.format(data['batteryChargePercent']) )
-		)
+		self.uiBatteryReadout.setText(
+			self.uiBatteryReadout.formatString.format(
+				api.apiValues.get('batteryChargePercent') ) )
 	
 	
 	def updateMotionHeatmap(self) -> None:
@@ -655,6 +660,13 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 			Note: This method is invoked from a button and from a state-change
 			watcher. This means that, once started, it will be called for each
 			marked region sequentially as saving completes."""
+		if [part for part in api.externalPartitions.list() if part.get('stale')]:
+			#Until UDisks2 has told us what's mounted, we only know what was mounted last time we ran. Don't save to a partition which may be gone.
+			(api.externalPartitions.ready
+				.then(lambda *_: self.saveMarkedRegion())
+				.catch(lambda error: log.error(f'Can not save, storage is unavailable. ({error})')) )
+			return
+		
 		uuid = settings.value('preferredFileSavingUUID', '')
 		if uuid in [part['uuid'] for part in api.externalPartitions.list()]:
 			#Use the operator-set partition.
@@ -807,6 +819,8 @@ class PlayAndSave(QtWidgets.QDialog, Ui_PlayAndSave):
 		
 	def onEOF(self, state):
 		log.print(f'onEOF {state}')
+		if state['filesave']:
+			api.externalPartitions.invalidateUsage() #We've just filled some of it up.
 		if state['filesave'] and not self.saveCancelled: #Check event is relevant to saving.
 			unsavedRegionsLeft = [r for r in self.markedRegions if r['saved'] == 0]
 			savedRegion = [r for r in self.markedRegions if r['region id'] == self.regionBeingSaved][:1]
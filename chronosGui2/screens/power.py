@@ -91,17 +91,17 @@ class Power(QtWidgets.QDialog, Ui_Power):
 		self.labelUpdateTimer.stop()
 	
 	def updateLabels(self):
+		#Battery values are cached and refreshed in the background by the API, so this doesn't hit D-Bus.
 		self.uiChargeLabel.setText(
 			self.uiChargeLabel.formatString.format(
-				self.control.getSync('batteryChargeNormalized')*100 ) )
+				api.apiValues.get('batteryChargeNormalized')*100 ) )
 		self.uiVoltageLabel.setText(
 			self.uiVoltageLabel.formatString.format(
-				self.control.getSync('batteryVoltage') ) )
+				api.apiValues.get('batteryVoltage') ) )
 		
 	def updateChartData(self):
 		"""Always update the chart data, even when hidden, so we can look at it later."""
-		cv = self.control.getSync(['batteryChargeNormalized', 'batteryVoltage'])
-		charge, voltage = cv['batteryChargeNormalized'], cv['batteryVoltage']
+		charge, voltage = api.apiValues.get('batteryChargeNormalized'), api.apiValues.get('batteryVoltage')
 		
 		if charge < 0 or voltage < 0:
 			return #Charge/voltage haven't initialized yet, don't record anything.
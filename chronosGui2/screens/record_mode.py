@@ -58,10 +58,9 @@ class RecordMode(QtWidgets.QDialog, Ui_RecordMode):
 		api.observe('recMode', self.setCurrentScreenIndexFromRecordMode)
 		self.uiRecordMode.currentIndexChanged.connect(self.changeShownTrigger)
 		
-		api.observe('cameraMaxFrames', self.recalculateEverything)
-		api.observe('recSegments',     self.recalculateEverything)
-		api.observe('recMaxFrames',    self.recalculateEverything)
-		api.observe('framePeriod',     self.recalculateEverything)
+		api.observe_all( #recMaxFrames is loaded in the background, so this waits for it.
+			['cameraMaxFrames', 'recSegments', 'recMaxFrames', 'framePeriod'],
+			self.recalculateEverything )
 		
 		self.uiSegmentLengthInSeconds.valueChanged.connect(lambda sec:
 			self.uiSegmentLengthInFrames.setValue(
@@ -84,14 +83,10 @@ class RecordMode(QtWidgets.QDialog, Ui_RecordMode):
 		self.control.set('recMode', self.availableRecordModeIds[index])
 	
 	
-	def recalculateEverything(self, _):
-		segments = api.apiValues.get('recSegments')
-		frames = api.apiValues.get('recMaxFrames')
-		frameTime = api.apiValues.get('framePeriod')
+	def recalculateEverything(self, maxFrames, segments, frames, frameTime):
 		totalTime = frames * frameTime / 1e9
 		segmentTime = totalTime / segments
 		segmentFrames = int(frames / segments)
-		maxFrames = api.apiValues.get('cameraMaxFrames')
 		segmentMaxFrames = int(maxFrames / segments)
 		maxTime = segmentMaxFrames * frameTime / 1e9
 		segmentMaxTime = maxTime / segments
@@ -1,5 +1,6 @@
 # -*- coding: future_fstrings -*-
 from collections import defaultdict
+from functools import partial
 import logging; log = logging.getLogger('Chronos.gui')
 from math import floor
 
@@ -43,20 +44,22 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 			self.uiDebug.show() if show else self.uiDebug.hide() )
 		self.uiDebug.clicked.connect(lambda: self and dbg())
 		
+		self.uiPresets.template = self.uiPresets.currentText()
+		self.presets = [] #Filled in by findPresets.
 		self.populatePresets()
 		self.uiPresets.currentIndexChanged.connect(self.applyPreset)
 		
 		#Resolution & resolution preview
-		invariants = self.control.getSync([
-			'sensorVMax', 'sensorVMin', 'sensorVIncrement',
-			'sensorHMax', 'sensorHMin', 'sensorHIncrement',
-		])
-		self.uiHRes.setMinimum(invariants['sensorHMin'])
-		self.uiVRes.setMinimum(invariants['sensorVMin'])
-		self.uiHRes.setMaximum(invariants['sensorHMax'])
-		self.uiVRes.setMaximum(invariants['sensorVMax'])
-		self.uiHRes.setSingleStep(invariants['sensorHIncrement'])
-		self.uiVRes.setSingleStep(invariants['sensorVIncrement'])
+		def updateSensorLimits(hMin, vMin, hMax, vMax, hIncrement, vIncrement):
+			self.uiHRes.setMinimum(hMin)
+			self.uiVRes.setMinimum(vMin)
+			self.uiHRes.setMaximum(hMax)
+			self.uiVRes.setMaximum(vMax)
+			self.uiHRes.setSingleStep(hIncrement)
+			self.uiVRes.setSingleStep(vIncrement)
+		api.observe_all([ #Priority keys, so this is called right away, before the resolution is filled in.
+			'sensorHMin', 'sensorVMin', 'sensorHMax', 'sensorVMax', 'sensorHIncrement', 'sensorVIncrement',
+		], updateSensorLimits )
 		
 		self.uiHRes.valueChanged.connect(self.updateForSensorHRes)
 		self.uiVRes.valueChanged.connect(self.updateForSensorVRes)
@@ -121,6 +124,8 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 		self.uiVRes.valueChanged.connect(markDirty)
 		self.uiHOffset.valueChanged.connect(markDirty)
 		self.uiVOffset.valueChanged.connect(markDirty)
+		
+		self.findPresets()
 	
 	__potentialPresetGeometries = [
 		[1920, 1080],
@@ -144,18 +149,37 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 		[336, 120],
 		[336, 96],
 	]
-	presets = []
-	for geometry_ in __potentialPresetGeometries: #Fix bug where this overrode the screen's geometry property, preventing any keyboard from opening.
-		hRes, vRes = geometry_[0], geometry_[1]
-		geometryTimingLimits = api.control().callSync('getResolutionTimingLimits', {'hRes':hRes, 'vRes':vRes})
-		if 'error' not in geometryTimingLimits:
-			presets += [{
-				'hRes': hRes, 
-				'vRes': vRes, 
-				'framerate': 1e9/geometryTimingLimits['minFramePeriod'],
-			}]
-		else:
-			log.debug(f'Rejected preset resolution {hRes}×{vRes}.')
+	def findPresets(self):
+		"""Ask the API which preset geometries can be recorded, and how fast, then list them."""
+		found = [None] * len(self.__potentialPresetGeometries) #Timing limits, in the order of the geometries.
+		remaining = [len(found)]
+		
+		def done(index, geometryTimingLimits):
+			found[index] = geometryTimingLimits
+			remaining[0] -= 1
+			if remaining[0]:
+				return
+			
+			self.presets = []
+			for (hRes, vRes), geometryTimingLimits in zip(self.__potentialPresetGeometries, found):
+				if 'error' not in geometryTimingLimits:
+					self.presets += [{
+						'hRes': hRes, 
+						'vRes': vRes, 
+						'framerate': 1e9/geometryTimingLimits['minFramePeriod'],
+					}]
+				else:
+					log.debug(f'Rejected preset resolution {hRes}×{vRes}.')
+			
+			self.uiPresets.blockSignals(True) #Don't apply whichever preset ends up selected.
+			self.populatePresets()
+			self.uiPresets.blockSignals(False)
+			self.selectCorrectPreset()
+		
+		for index, (hRes, vRes) in enumerate(self.__potentialPresetGeometries):
+			(self.control.call('getResolutionTimingLimits', {'hRes':hRes, 'vRes':vRes})
+				.then(partial(done, index))
+				.catch(lambda error, index=index: done(index, {'error': error})) )
 	
 	allRecordingGeometrySettings = ['uiHRes', 'uiVRes', 'uiHOffset', 'uiVOffset', 'uiFps'] #'uiFrameDuration' and 'uiAnalogGain' are not part of the preset, since they're not geometries.
 	
@@ -192,7 +216,7 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 	
 	
 	def populatePresets(self):
-		formatString = self.uiPresets.currentText()
+		formatString = self.uiPresets.template
 		self.uiPresets.clear()
 		
 		for preset in settings.value('customRecordingPresets', []):
@@ -383,12 +407,13 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 	def updateMaximumFramerate(self, minFrameTime=None):
 		if minFrameTime:
 			#Shortcut. We can do this because the exposure values set below by the real call are not required when an API-driven update is fired, since the API-driven update will also update the exposure. I think. 🤞
-			limits = {'minFramePeriod': minFrameTime*1e9}
-		else:
-			limits = self.control.callSync('getResolutionTimingLimits', {
-				'hRes': self.uiHRes.value(),
-				'vRes': self.uiVRes.value(),
-			})
+			self.updateMaximumFramerate2({'minFramePeriod': minFrameTime*1e9})
+			return
+		
+		hRes, vRes = self.uiHRes.value(), self.uiVRes.value()
+		def updateFromTimingLimits(limits):
+			if (hRes, vRes) != (self.uiHRes.value(), self.uiVRes.value()):
+				return #Resolution changed while we were waiting, a newer call will take care of it.
 			
 			if 'error' in limits:
 				log.error(f"Error retrieving maximum framerate for {hRes}×{vRes}: {limits['error']}")
@@ -397,7 +422,14 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 			#Note this down for future use by `updateExposureLimits`.
 			self._lastKnownFramerateOverheadNs = limits['minFramePeriod'] - limits['exposureMax']
 			self.uiExposure.setMinimum(limits['exposureMin'])
+			self.updateMaximumFramerate2(limits)
 		
+		self.control.call('getResolutionTimingLimits', {
+			'hRes': hRes,
+			'vRes': vRes,
+		}).then(updateFromTimingLimits)
+	
+	def updateMaximumFramerate2(self, limits):
 		log.debug(f"Framerate for {self.uiHRes.value()}×{self.uiVRes.value()}: {1e9 / limits['minFramePeriod']}")
 		
 		framerateIsMaxed = abs(self.uiFps.maximum() - self.uiFps.value()) <= 1 #There is a bit of uncertainty here, occasionally, of about 0.1 fps.
@@ -408,9 +440,8 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 		self.updateExposureLimits()
 	
 	
-	_sensorWidth = api.control().getSync('sensorHMax')
-	_sensorHeight = api.control().getSync('sensorVMax')
 	def updatePassepartout(self):
+		sensorWidth, sensorHeight = api.apiValues.get('sensorHMax'), api.apiValues.get('sensorVMax')
 		previewTop = 1
 		previewLeft = 1
 		previewWidth = self.uiPreviewPanel.geometry().right() - self.uiPreviewPanel.geometry().left()
@@ -421,10 +452,10 @@ class RecordingSettings(QtWidgets.QDialog, Ui_RecordingSettings):
 		recordingRight = self.uiHOffset.value() + self.uiHRes.value()
 		recordingBottom = self.uiVOffset.value() + self.uiVRes.value()
 		
-		passepartoutTop = round(recordingTop / self._sensorHeight * previewHeight)
-		passepartoutLeft = round(recordingLeft / self._sensorWidth * previewWidth)
-		passepartoutWidth = round((recordingRight - recordingLeft) / self._sensorWidth * previewWidth)
-		passepartoutHeight = round((recordingBottom - recordingTop) / self._sensorHeight * previewHeight)
+		passepartoutTop = round(recordingTop / sensorHeight * previewHeight)
+		passepartoutLeft = round(recordingLeft / sensorWidth * previewWidth)
+		passepartoutWidth = round((recordingRight - recordingLeft) / sensorWidth * previewWidth)
+		passepartoutHeight = round((recordingBottom - recordingTop) / sensorHeight * previewHeight)
 		
 		self.uiPassepartoutTop.setGeometry(
 			previewLeft,
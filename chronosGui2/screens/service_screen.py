@@ -43,7 +43,7 @@ class ServiceScreenLocked(QtWidgets.QDialog, Ui_ServiceScreenLocked):
 		self.uiPassword.setText('') #Clear placeholder text.
 		self.uiPassword.textChanged.connect(self.checkPassword)
 
-		self.uiShippingMode.setChecked(self.control.getSync('shippingMode'))
+		self.control.get('shippingMode').then(self.updateShippingMode)
 		self.uiShippingMode.stateChanged.connect(self.setShippingMode)
 
 		self.uiDone.clicked.connect(window.back)
@@ -68,11 +68,19 @@ class ServiceScreenLocked(QtWidgets.QDialog, Ui_ServiceScreenLocked):
 		if guess == self.unlockPassword:
 			self.unlock()
 
+	def updateShippingMode(self, enabled):
+		self.uiShippingMode.blockSignals(True) #Don't set the value we just got back.
+		self.uiShippingMode.setChecked(enabled)
+		self.uiShippingMode.blockSignals(False)
+	
 	def setShippingMode(self, value):
-		self.control.setSync({'shippingMode' : bool(value)})
+		self.control.set({'shippingMode' : bool(value)})
 	
 	def shippingModeStatus(self):
-		if (self.control.getSync('shippingMode')):
+		self.control.get('shippingMode').then(self.shippingModeStatus2)
+	
+	def shippingModeStatus2(self, enabled):
+		if enabled:
 			self.shippingModeMessage.showMessage('Shipping Mode Enabled\n\nOn the next restart, the AC adapter must be plugged in to turn the camera on.')
 		else:
 			self.shippingModeMessage.showMessage('Shipping Mode Disabled')
@@ -43,16 +43,20 @@ class TriggerDelay(QtWidgets.QDialog, Ui_TriggerDelay):
 		
 		# Value init.
 		self.availableDelayMultiplier = 1. #Used for "more" and "less" pre-record delay. Multiplies totalAvailableFrames.
+		self.cameraMaxFrames, self.framePeriod, self.recTrigDelay = 0, 1, 0 #Until updateRecordingParameters. recTrigDelay is loaded in the background, after the first screen.
 		
-		relevantValues = self.control.getSync(['cameraMaxFrames', 'framePeriod', 'recTrigDelay'] )
-		self.cameraMaxFrames = relevantValues['cameraMaxFrames']
-		self.framePeriod = relevantValues['framePeriod']
-		self.recTrigDelay = relevantValues['recTrigDelay']
+		self.inputs = [
+			self.uiTriggerDelaySlider, self.ui0Pct, self.ui50Pct, self.ui100Pct,
+			self.uiPreRecordDelayFrames, self.uiPreRecordDelaySec,
+			self.uiPreTriggerRecordingFrames, self.uiPreTriggerRecordingSec,
+			self.uiPostTriggerRecordingFrames, self.uiPostTriggerRecordingSec,
+		]
+		for input in self.inputs:
+			input.setEnabled(False)
 		
-		api.observe_future_only('cameraMaxFrames', self.updateTotalAvailableFrames)
-		api.observe_future_only('framePeriod', self.updateRecordingPeriod)
-		api.observe_future_only('recTrigDelay', self.updateTriggerDelay)
-		self.updateDisplayedValues()
+		api.observe_all(
+			['cameraMaxFrames', 'framePeriod', 'recTrigDelay'],
+			self.updateRecordingParameters )
 		
 		# Button binding.
 		self.ui0Pct.clicked.connect(lambda:
@@ -90,25 +94,11 @@ class TriggerDelay(QtWidgets.QDialog, Ui_TriggerDelay):
 		return frames * self.framePeriod / 1e9 #🤞 convert framePeriod to seconds, then multiply to get the duration for frames
 	
 	
-	# @pyqtSlot(int, name="updateTotalAvailableFrames")
-	# @silenceCallbacks('uiTriggerDelaySlider')
-	def updateTotalAvailableFrames(self, frames: int):
-		self.cameraMaxFrames = frames
-		self.updateDisplayedValues()
-	
-	
-	# @pyqtSlot(int, name="updateRecordingPeriod")
-	# @silenceCallbacks()
-	def updateRecordingPeriod(self, frames: int):
-		self.framePeriod = frames
-		self.updateDisplayedValues()
-	
-	
-	# @pyqtSlot(int, name="updateTriggerDelay")
-	# @silenceCallbacks()
-	def updateTriggerDelay(self, frames: int):
-		self.recTrigDelay = frames
+	def updateRecordingParameters(self, cameraMaxFrames, framePeriod, recTrigDelay):
+		self.cameraMaxFrames, self.framePeriod, self.recTrigDelay = cameraMaxFrames, framePeriod, recTrigDelay
 		self.updateDisplayedValues()
+		for input in self.inputs:
+			input.setEnabled(True)
 	
 	
 	# @silenceCallbacks('uiTriggerDelaySlider',
@@ -132,7 +132,13 @@ class TriggersAndIO(QtWidgets.QDialog, Ui_TriggersAndIo):
 	
 	def __init__(self, window):
 		super().__init__()
+		self._window = window
+	
+	def constructionSteps(self):
+		"""Build the screen, yielding to the event loop now and then. See Window._instantiationSteps."""
+		window = self._window
 		self.setupUi(self)
+		yield
 		
 		# Panel init.
 		self.setFixedSize(window.app.primaryScreen().virtualSize())
@@ -149,6 +155,7 @@ class TriggersAndIO(QtWidgets.QDialog, Ui_TriggersAndIo):
 		self.uiIndividualTriggerConfigurationPanes.setCurrentIndex(0) 
 		
 		self.load(actions=actionData, triggers=triggerData)
+		yield
 		
 		self.oldIOMapping = defaultdict(lambda: defaultdict(lambda: None)) #Set part and parcel to whatever the most recent mapping is.
 		self.newIOMapping = defaultdict(lambda: defaultdict(lambda: None)) #Set piece-by-piece to the new mapping.
@@ -170,6 +177,7 @@ class TriggersAndIO(QtWidgets.QDialog, Ui_TriggersAndIo):
 		self.uiTriggerList.currentIndexChanged.connect(self.uiPreview.update)
 		self.uiInvertCondition.stateChanged.connect(self.onInvertChanged)
 		self.uiDebounce.stateChanged.connect(self.onDebounceChanged)
+		yield
 		
 		#When we change an input, mark the current state dirty until we save.
 		self.uiTriggerList   .currentIndexChanged.connect(self.markStateDirty)
@@ -621,8 +629,8 @@ class TriggersAndIO(QtWidgets.QDialog, Ui_TriggersAndIo):
 		p.drawPath(path)
 
 	def updateLiveIoStatus(self):
-		# Show the live status for all of the IO lines
-		ioStatus = self.control.getSync('ioSourceStatus')
+		# Show the live status for all of the IO lines. (Cached, the API refreshes it in the background.)
+		ioStatus = api.apiValues.get('ioSourceStatus')
 		self.uiIoStat1.showMessage('LOW' if ioStatus['io1'] else 'HIGH')
 		self.uiIoStat2.showMessage('LOW' if ioStatus['io2'] else 'HIGH')
 		self.uiIoStat3.showMessage('LOW' if ioStatus['io3'] else 'HIGH')
\ No newline at end of file
@@ -0,0 +1,172 @@
+# -*- coding: future_fstrings -*-
+"""Profile startup, and write the timeline out as a Chrome trace.
+
+	Set $CHRONOS_STARTUP_PROFILE to a file name to turn it on:
+		CHRONOS_STARTUP_PROFILE=startup.json python3 -m chronosGui2
+	then open the file in chrome://tracing or https://ui.perfetto.dev.
+	
+	The timeline has a span for each module imported, each generated
+	form's setupUi, the D-Bus bootstrap phases, stylesheet application
+	and screen construction, with a mark at first paint. Time 0 is when
+	the process started, so interpreter startup shows up too. The trace
+	is written at first paint, and again when the gui exits, to catch
+	what happened later, such as screen precaching and the background
+	loading of API values.
+	
+	This module must not import anything from chronosGui2 or Qt, since
+	it has to be running before they're imported to time them.
+	
+	Usage, elsewhere:
+		with startup_profile.span('apply stylesheet'):
+			app.setStyleSheet(…)
+		
+		start = perf_counter()
+		…later…
+		startup_profile.complete('load deferred keys', 'dbus', start)
+	
+	When profiling is off, these do next to nothing.
+"""
+
+import sys, os
+import json
+import atexit
+import threading
+import importlib.abc
+from time import perf_counter
+from contextlib import contextmanager
+
+PROFILE_PATH = os.environ.get('CHRONOS_STARTUP_PROFILE', '')
+enabled = bool(PROFILE_PATH)
+
+_events = [] #Chrome trace events.
+_origin = perf_counter() #Trace time 0, in perf_counter time. Moved back to process start below, if we can work it out.
+
+
+def complete(name: str, category: str, start: float, end: float = None, **args):
+	"""Record a span which started at perf_counter() time start, and ended at end or now."""
+	if not enabled:
+		return
+	end = perf_counter() if end is None else end
+	_events.append({
+		'name': name, 'cat': category, 'ph': 'X',
+		'ts': (start - _origin) * 1e6, 'dur': (end - start) * 1e6, #µs
+		'pid': os.getpid(), 'tid': threading.get_ident(),
+		**({'args': args} if args else {}),
+	})
+
+@contextmanager
+def span(name: str, category: str = 'gui', **args):
+	"""Record how long the with block takes."""
+	if not enabled:
+		yield
+		return
+	start = perf_counter()
+	try:
+		yield
+	finally:
+		complete(name, category, start, **args)
+
+def mark(name: str, category: str = 'gui', **args):
+	"""Record a point in time, such as first paint."""
+	if not enabled:
+		return
+	_events.append({
+		'name': name, 'cat': category, 'ph': 'i', 's': 'p',
+		'ts': (perf_counter() - _origin) * 1e6,
+		'pid': os.getpid(), 'tid': threading.get_ident(),
+		**({'args': args} if args else {}),
+	})
+
+
+def write(path: str = PROFILE_PATH):
+	"""Write the trace so far to path."""
+	if not enabled:
+		return
+	with open(path, 'w') as file:
+		json.dump({
+			'traceEvents': [{
+				'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': threading.main_thread().ident,
+				'args': {'name': 'gui'},
+			}] + _events,
+			'displayTimeUnit': 'ms',
+		}, file)
+	print(f'Startup profile written to {path}.', file=sys.stderr)
+
+
+class _ProfiledLoader(importlib.abc.Loader):
+	"""Wraps a module's loader, to time running the module."""
+	
+	def __init__(self, loader, name: str):
+		self._loader = loader
+		self._name = name
+	
+	def __getattr__(self, attr):
+		return getattr(self._loader, attr)
+	
+	def create_module(self, spec):
+		return self._loader.create_module(spec)
+	
+	def exec_module(self, module):
+		#Put the real loader back, so nothing else sees this one.
+		module.__loader__ = self._loader
+		if module.__spec__:
+			module.__spec__.loader = self._loader
+		
+		start = perf_counter()
+		try:
+			self._loader.exec_module(module)
+		finally:
+			complete(f'import {self._name}', 'import', start)
+		
+		if self._name.startswith('chronosGui2.generated.'):
+			_profileForms(module)
+
+class _ImportProfiler(importlib.abc.MetaPathFinder):
+	"""Finds modules with the rest of sys.meta_path, and times loading them."""
+	
+	def find_spec(self, name, path, target=None):
+		for finder in sys.meta_path:
+			if finder is self or not hasattr(finder, 'find_spec'):
+				continue
+			spec = finder.find_spec(name, path, target)
+			if spec is not None:
+				break
+		else:
+			return None
+		
+		if hasattr(spec.loader, 'exec_module'):
+			spec.loader = _ProfiledLoader(spec.loader, name)
+		return spec
+
+def _profileForms(module):
+	"""Time setupUi of the Qt Designer forms in a generated module."""
+	def profiled(form, setupUi):
+		def setupUiProfiled(self, *args, **kwargs):
+			with span(f'{form}.setupUi', 'setupUi'):
+				return setupUi(self, *args, **kwargs)
+		return setupUiProfiled
+	
+	for name, form in vars(module).items():
+		if name.startswith('Ui_') and isinstance(form, type) and 'setupUi' in vars(form):
+			form.setupUi = profiled(name, form.setupUi)
+
+
+def _processStart():
+	"""Return when the process started, in perf_counter time, or None if we can't tell."""
+	try:
+		with open('/proc/self/stat') as stat:
+			startedTicks = int(stat.read().rsplit(')', 1)[1].split()[19]) #Field 22, counting from 1 with the two before the ).
+		with open('/proc/uptime') as uptime:
+			uptime = float(uptime.read().split()[0])
+		return perf_counter() - (uptime - startedTicks / os.sysconf('SC_CLK_TCK'))
+	except (OSError, ValueError, IndexError):
+		return None
+
+
+if enabled:
+	profilerStarted = perf_counter()
+	_origin = _processStart() or profilerStarted
+	complete('interpreter startup', 'python', _origin, profilerStarted)
+	
+	sys.meta_path.insert(0, _ImportProfiler())
+	atexit.register(write)
@@ -1,30 +1,167 @@
 # -*- coding: future_fstrings -*-
 
-from urllib.request import urlopen
+"""Report program statistics to an internal server, stats.node.js.
+
+Reports are queued in memory and sent in batches by a worker thread, so
+reporting never waits on the network. Once the server has been reached,
+reports which couldn't be sent yet are kept in a spool file, and sent
+when the server can be reached again. Until then, reports which can't be
+sent are dropped, since most cameras never see the server, and there's
+no point filling their disks with reports for it.
+"""
+
+import os
 import json
+import atexit
+import threading
+from time import sleep
+from collections import deque
+from email.utils import formatdate
+from urllib.request import urlopen, Request
 import logging; log = logging.getLogger('Chronos.perf')
 
 import chronosGui2.api as api
 
 report_url = 'http://192.168.1.55:19861'
+spool_path = os.environ.get('CHRONOS_STATS_SPOOL', os.path.expanduser('~/.cache/chronos-gui2-stats.jsonl'))
+queue_size = 1000 #Reports waiting for the worker. If it falls behind, the oldest are dropped.
+spool_size = 10000 #Reports kept on disk while the server is unreachable. Once full, new reports are dropped.
+batch_size = 50 #Reports sent per request.
+flush_interval = 5 #s, between sends.
+retry_interval_max = 300 #s; while the server is unreachable, we try less and less often, up to this.
+upload_timeout = 2 #s. We're not on the GUI thread, so we can afford to wait a bit.
+
 contact_warned = False
+_server_reached = False #Reports are only spooled once they can be sent.
+_serial_number = None
+_queue = deque(maxlen=queue_size) #Appending and popping are thread-safe.
+_worker = None
+_spool_lock = threading.Lock() #The worker and atexit both write the spool.
+
+
 def report(tag: str, data: dict):
-	"""Report program statistics to an internal server, stats.node.js."""
+	"""Report program statistics to an internal server, stats.node.js.
+		
+		Returns immediately. The report is sent later, by a worker thread."""
 	assert tag
 	assert "tag" not in data
 	assert "serial_number" not in data
-		
+	
+	global _serial_number, _worker
+	if _serial_number is None:
+		_serial_number = api.apiValues.get('cameraSerial') #Cached, and it won't change while we're running.
+	
 	data["tag"] = tag
-	data["serial_number"] = api.control().getSync('cameraSerial')
+	data["serial_number"] = _serial_number
+	data["timestamp"] = formatdate(usegmt=True) #When it happened, not when it was sent. Same format as stats.node.js used to fill in.
+	_queue.append(data)
+	
+	if not _worker:
+		_worker = threading.Thread(target=_run, name='stats uploader', daemon=True)
+		_worker.start()
+
+def report_mock(tag: str, data: dict):
+	"""Report program statistics to nothing."""
+	pass
+
+
+def _run():
+	"""Worker thread. Spool queued reports, and send the spool to the server.
+		
+		Until the server has been reached, queued reports are sent
+		directly, and dropped if they can't be."""
+	global _server_reached
+	spooled = len(_read_spool())
+	_server_reached = _server_reached or bool(spooled) #Anything spooled was spooled after reaching the server last time.
+	retry_interval = flush_interval
+	while True:
+		sleep(retry_interval)
+		if not _server_reached:
+			reports = _take_queue()
+			if not reports:
+				continue
+			
+			sent = _send(reports)
+			if sent:
+				_server_reached = True
+				spooled = _spool(reports[sent:], spooled)
+			retry_interval = min(retry_interval*2, retry_interval_max) if sent < len(reports) else flush_interval
+			continue
+		
+		spooled = _spool(_take_queue(), spooled)
+		if not spooled:
+			continue
+		
+		spooled = _send_spool()
+		retry_interval = min(retry_interval*2, retry_interval_max) if spooled else flush_interval
+
+def _take_queue() -> list:
+	reports = []
+	while _queue:
+		reports += [_queue.popleft()]
+	return reports
+
+def _spool(reports: list, spooled: int) -> int:
+	"""Append reports to the spool file, up to spool_size. Returns the number of reports spooled."""
+	reports = reports[:max(0, spool_size - spooled)] #Drop the newest, so we never have to rewrite the spool to trim it.
+	if not reports:
+		return spooled
+	
+	with _spool_lock:
+		_write_spool(reports, 'a')
+	return spooled + len(reports)
+
+def _send(reports: list) -> int:
+	"""Send reports in batches, until done or one fails. Returns the number of reports sent."""
+	global contact_warned
+	
+	sent = 0
 	try:
-		urlopen(report_url, bytes(json.dumps(data), 'utf-8'), 0.1)
+		while sent < len(reports):
+			batch = reports[sent:sent+batch_size]
+			urlopen(Request(report_url, bytes(json.dumps(batch), 'utf-8'), {'Content-Type': 'application/json'}), timeout=upload_timeout)
+			sent += len(batch)
 	except Exception:
-		global contact_warned
 		if not contact_warned:
 			contact_warned = True
-			log.warn(f'Could not contact the stats server at {report_url}.')
-		pass
+			log.warn(f'Could not contact the stats server at {report_url}. ' + (
+				f'Reports will be kept in {spool_path} until it can be.' if _server_reached else
+				'Reports will be dropped until it can be.' ))
+	return sent
+
+def _send_spool() -> int:
+	"""Send spooled reports in batches, until done or one fails. Returns the number of reports left."""
+	with _spool_lock:
+		reports = _read_spool()
 	
-def report_mock(tag: str, data: dict):
-	"""Report program statistics to nothing."""
-	pass
\ No newline at end of file
+	sent = _send(reports)
+	if sent:
+		with _spool_lock:
+			#More may have been spooled at exit while we were sending, so reread.
+			_write_spool(_read_spool()[sent:], 'w')
+	return len(reports) - sent
+
+def _read_spool() -> list:
+	try:
+		with open(spool_path) as spool:
+			return [json.loads(line) for line in spool if line.strip()]
+	except FileNotFoundError:
+		return []
+	except (OSError, ValueError) as e:
+		log.warn(f'Discarding unreadable stats spool {spool_path}. ({e})')
+		return []
+
+def _write_spool(reports: list, mode: str):
+	try:
+		os.makedirs(os.path.dirname(spool_path), exist_ok=True)
+		with open(spool_path, mode) as spool:
+			spool.writelines(json.dumps(report) + '\n' for report in reports)
+	except OSError as e:
+		log.warn(f'Could not write stats spool {spool_path}. ({e})')
+
+@atexit.register
+def _spool_remaining():
+	"""Don't lose the reports which haven't been spooled yet when we exit. They're sent next time."""
+	if not _server_reached:
+		return
+	_spool(_take_queue(), len(_read_spool()))
@@ -0,0 +1,145 @@
+# -*- coding: future_fstrings -*-
+"""Cheap logging for hot paths, such as every D-Bus call.
+
+	A StructuredLogger logs events, which are a name and some fields,
+	rather than formatted messages:
+		
+		hotLog = structured_log.getLogger('Chronos.api')
+		hotLog.debug('enqueue', call=id(promise), method='get', keys=keys)
+	
+	Nothing is formatted unless a handler actually writes the event out,
+	so a disabled event costs about as much as a function call. Events
+	still go through the standard logging module, under the same logger
+	names and levels as everything else. The event name and fields are on
+	the log record as record.event and record.fields, for handlers which
+	want them.
+	
+	Sampling:
+		Busy loggers can be sampled, to keep every Nth event at INFO and
+		below. Warnings and errors are never sampled. Set sampling rates
+		with $CHRONOS_LOG_SAMPLE, such as:
+			CHRONOS_LOG_SAMPLE='Chronos.api=0.1,Chronos.api.notify=0.01'
+		or setSampleRate(). A logger without a rate of its own uses its
+		parent's.
+	
+	Ring buffer:
+		Every event is also kept, unformatted and unsampled, in a ring
+		buffer of the last $CHRONOS_LOG_RING (default 2048) events,
+		whatever the log level. Fields are kept as they were passed, so
+		pass cheap, immutable values, such as names, keys and ids, not
+		live objects, which the ring would keep alive and which could
+		change before they're written out. dump() writes it out. installCrashDump()
+		does that when the gui dies of an uncaught exception, so we
+		can see what the API was doing right before.
+"""
+
+import sys, os
+import logging
+from time import perf_counter, time
+from collections import deque
+from typing import TextIO
+
+RING_SIZE = int(os.environ.get('CHRONOS_LOG_RING', 2048)) #0 turns the ring buffer off.
+CRASH_DUMP_PATH = os.environ.get('CHRONOS_LOG_DUMP', '/tmp/chronos-gui2-log-ring.txt')
+
+_ring = deque(maxlen=RING_SIZE) #(perf_counter, level, logger name, event, fields)
+_startedAt = (perf_counter(), time()) #To turn ring timestamps back into wall-clock time.
+_sampleRates = {} #logger name: rate
+_loggers = {} #name: StructuredLogger
+
+
+class Event():
+	"""A log message, formatted when something asks for it."""
+	__slots__ = ('name', 'fields')
+	
+	def __init__(self, name: str, fields: dict):
+		self.name = name
+		self.fields = fields
+	
+	def __str__(self):
+		return ' '.join([self.name] + [f'{key}={value!r}' for key, value in self.fields.items()])
+
+
+class StructuredLogger():
+	"""Log events on a standard logger, lazily and optionally sampled. Use getLogger() to create one."""
+	
+	def __init__(self, name: str):
+		self.name = name
+		self.logger = logging.getLogger(name)
+		self._every = 1 #Log every Nth event. See setSampleRate().
+		self._seen = 0
+		self._updateSampleRate()
+	
+	def _updateSampleRate(self):
+		name = self.name
+		while name not in _sampleRates and '.' in name:
+			name = name.rsplit('.', 1)[0]
+		rate = _sampleRates.get(name, 1)
+		self._every = max(1, round(1/rate)) if rate > 0 else 0
+	
+	def log(self, level: int, event: str, **fields):
+		if RING_SIZE:
+			_ring.append((perf_counter(), level, self.name, event, fields))
+		
+		if not self.logger.isEnabledFor(level):
+			return
+		if level <= logging.INFO and self._every != 1:
+			self._seen += 1
+			if not self._every or self._seen % self._every:
+				return
+		
+		self.logger.log(level, Event(event, fields), extra={'event': event, 'fields': fields})
+	
+	def debug(self, event: str, **fields):
+		self.log(logging.DEBUG, event, **fields)
+	
+	def info(self, event: str, **fields):
+		self.log(logging.INFO, event, **fields)
+	
+	def warning(self, event: str, **fields):
+		self.log(logging.WARNING, event, **fields)
+	
+	def isEnabledFor(self, level: int) -> bool:
+		return self.logger.isEnabledFor(level)
+
+
+def getLogger(name: str) -> StructuredLogger:
+	"""Get the StructuredLogger for the standard logger of the same name."""
+	if name not in _loggers:
+		_loggers[name] = StructuredLogger(name)
+	return _loggers[name]
+
+
+def setSampleRate(name: str, rate: float):
+	"""Keep rate (0 to 1) of the DEBUG and INFO events logged by name, and its children without a rate of their own."""
+	_sampleRates[name] = rate
+	for logger in _loggers.values():
+		logger._updateSampleRate()
+
+for setting in filter(None, os.environ.get('CHRONOS_LOG_SAMPLE', '').split(',')):
+	name, rate = setting.split('=')
+	setSampleRate(name.strip(), float(rate))
+
+
+def dump(file: TextIO):
+	"""Write the ring buffer out, oldest event first."""
+	start, wallStart = _startedAt
+	for timestamp, level, name, event, fields in list(_ring):
+		try:
+			message = str(Event(event, fields))
+		except Exception as e: #A field's repr can fail, especially on a dying gui.
+			message = f'{event} (fields unprintable: {e!r})'
+		file.write(f'{wallStart + timestamp - start:.3f} {logging.getLevelName(level):>8} {name} {message}\n')
+
+def installCrashDump(path: str = CRASH_DUMP_PATH):
+	"""Dump the ring buffer to path when an exception goes uncaught."""
+	previousHook = sys.excepthook
+	def excepthook(*exception):
+		try:
+			with open(path, 'w') as file:
+				dump(file)
+			logging.getLogger('Chronos.api').critical(f'Recent events written to {path}.')
+		except Exception:
+			logging.getLogger('Chronos.api').exception(f'Could not write recent events to {path}.')
+		previousHook(*exception)
+	sys.excepthook = excepthook
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+# -*- coding: future_fstrings -*-
+"""Keep a warmed-up interpreter around, and fork the gui from it.
+
+	Restarting the gui means starting Python, importing PyQt, and loading
+	our 14MB of assets all over again, before we even get to talking to
+	the camera. This keeps a process around which has done that already,
+	and forks a fresh gui off it whenever the gui needs to (re)start.
+	
+	Run this file directly, not with -m, since importing the chronosGui2
+	package connects to the camera's API:
+		python3 chronosGui2/zygote.py [gui arguments, such as --pdb]
+	
+	The gui is restarted when:
+		- It crashes. (It exits with anything other than 0, or is killed.)
+		  Like systemd's Restart=on-failure, if the gui exits with 0 on
+		  purpose we exit too.
+		- We get SIGHUP, so `systemctl reload chronos-gui2` restarts the gui
+		  quickly, where `systemctl restart chronos-gui2` starts over.
+		- Someone kills the gui, such as util/watch-camera.sh when the
+		  source changes.
+	
+	What's preloaded:
+		Only what's safe to share with a forked child. That's the standard
+		library, PyQt5 and the Qt libraries it loads, the compiled assets,
+		and the code of the generated forms. (They're handed to the gui when
+		it imports them; see _Preloaded.) Nothing else from chronosGui2 is
+		preloaded: importing the api connects to D-Bus and loads the camera's
+		state, which a forked child can't share with us, and settings and
+		the widgets import or read things which would be stale by the time
+		the gui is forked. The generated forms import the widgets, so their
+		code is only read and compiled here, and is run by the gui when it
+		imports them. Qt is not started either, since the
+		linuxfb and touch input plugins start threads, which don't survive
+		a fork. So the gui still has to load the api and build its first
+		screen itself; this saves the rest.
+"""
+
+import sys, os
+import glob
+import time
+import signal
+import importlib.abc
+import importlib.machinery
+import importlib.util
+
+KILL_GRACE = 2 #s after asking the gui to stop before killing it. pdb ignores SIGTERM on the camera.
+MIN_RESTART_INTERVAL = 2 #s; don't restart a gui which keeps crashing immediately any faster than this.
+
+_preloadModules = [ #Imported by the gui, and safe to import before forking. Anything which starts a thread or opens a connection isn't.
+	'PyQt5.QtCore', 'PyQt5.QtGui', 'PyQt5.QtWidgets', 'PyQt5.QtDBus',
+	'argparse', 'atexit', 'binascii', 'collections', 'concurrent.futures',
+	'contextlib', 'datetime', 'difflib', 'email.utils', 'fcntl', 'functools',
+	'glob', 'gzip', 'hashlib', 'importlib', 'ipaddress', 'json', 'logging',
+	'math', 'pathlib', 'pdb', 'platform', 'pprint', 'random', 're', 'shutil',
+	'string', 'subprocess', 'threading', 'typing', 'urllib.request',
+]
+_preloaded = {} #module name: module, loaded but not in sys.modules. See _Preloaded.
+_preloadedCode = {} #module name: (path, code), compiled but not run. See _Preloaded.
+
+packageDir = os.path.dirname(os.path.abspath(__file__))
+
+
+def log(message: str):
+	#Not logging, because the gui sets that up itself, and basicConfig() does nothing if it's already been done.
+	print(f'chronos-gui2 zygote: {message}', file=sys.stderr, flush=True)
+
+
+class _Preloaded(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+	"""Hand modules we loaded before forking to the gui, when it imports them.
+		
+		The assets module is in the chronosGui2.generated package, but
+		we can't import that package until we've forked. So it's loaded
+		on its own, and when the gui imports it in the usual way, this
+		finds it instead of loading it again. The generated forms are
+		in the same package, but they import the widgets, which import
+		the api, so only their code is loaded. This runs it, instead of
+		reading and unmarshalling (or compiling) it again."""
+	
+	def find_spec(self, name, path, target=None):
+		if name in _preloaded:
+			return importlib.util.spec_from_loader(name, self, origin=_preloaded[name].__file__)
+		if name in _preloadedCode:
+			return importlib.util.spec_from_file_location(name, _preloadedCode[name][0], loader=self)
+		return None
+	
+	def create_module(self, spec):
+		return _preloaded.pop(spec.name, None) #None makes a new module, for preloaded code.
+	
+	def exec_module(self, module):
+		if module.__name__ in _preloadedCode:
+			exec(_preloadedCode.pop(module.__name__)[1], module.__dict__)
+		#Otherwise, already run.
+
+
+def preload():
+	start = time.perf_counter()
+	
+	for name in _preloadModules:
+		try:
+			importlib.import_module(name)
+		except ImportError as e:
+			log(f'could not preload {name}. ({e})')
+	
+	name = 'chronosGui2.generated.assets_rc'
+	spec = importlib.util.spec_from_file_location(name, os.path.join(packageDir, 'generated', 'assets_rc.py'))
+	try:
+		module = importlib.util.module_from_spec(spec)
+		spec.loader.exec_module(module) #Registers the assets with Qt.
+		_preloaded[name] = module
+	except (ImportError, OSError) as e: #Not generated yet? Then the gui will complain about it.
+		log(f'could not preload {name}. ({e})')
+	
+	generatedDir = os.path.join(packageDir, 'generated')
+	for path in glob.glob(os.path.join(generatedDir, '**', '*.py'), recursive=True):
+		if os.path.basename(path) in ('__init__.py', 'assets_rc.py', 'version.py'): #Only the forms, not the packages they're in.
+			continue
+		name = 'chronosGui2.generated.' + os.path.relpath(path, generatedDir)[:-len('.py')].replace(os.sep, '.')
+		try:
+			_preloadedCode[name] = (path, importlib.machinery.SourceFileLoader(name, path).get_code(name))
+		except (ImportError, OSError, SyntaxError) as e:
+			log(f'could not preload {name}. ({e})')
+	
+	log(f'preloaded in {time.perf_counter() - start:.2f}s.')
+
+
+def runGui(args: list):
+	"""Become the gui. Only called in the forked child. Never returns."""
+	for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGALRM):
+		signal.signal(sig, signal.SIG_DFL)
+	signal.signal(signal.SIGINT, signal.default_int_handler)
+	
+	import random; random.seed() #Otherwise every gui we fork gets the same "random" numbers.
+	
+	sys.meta_path.insert(0, _Preloaded())
+	sys.argv = ['chronosGui2'] + args
+	
+	from chronosGui2.__main__ import main
+	main()
+	sys.exit(0)
+
+
+def describe(status: int) -> str:
+	if os.WIFSIGNALED(status):
+		return f'was killed by signal {os.WTERMSIG(status)}'
+	return f'exited with code {os.WEXITSTATUS(status)}'
+
+
+def main():
+	if sys.path[0] == packageDir:
+		sys.path[0] = os.path.dirname(packageDir) #Run as a file, so import chronosGui2 as a package instead of its modules as top-level ones.
+	preload()
+	
+	gui = None #pid
+	restartRequested = False
+	stopRequested = False
+	
+	def stopGui():
+		if gui:
+			os.kill(gui, signal.SIGTERM)
+			signal.alarm(KILL_GRACE) #See killGui.
+	
+	def restart(*_):
+		nonlocal restartRequested
+		restartRequested = True
+		stopGui()
+	
+	def stop(*_):
+		nonlocal stopRequested
+		stopRequested = True
+		stopGui()
+	
+	def killGui(*_):
+		gui and os.kill(gui, signal.SIGKILL)
+	
+	signal.signal(signal.SIGHUP, restart)
+	signal.signal(signal.SIGTERM, stop)
+	signal.signal(signal.SIGINT, stop)
+	signal.signal(signal.SIGALRM, killGui)
+	
+	while True:
+		forkedAt = time.monotonic()
+		gui = os.fork()
+		if not gui:
+			runGui(sys.argv[1:])
+		log(f'started gui, pid {gui}.')
+		
+		_, status = os.waitpid(gui, 0) #Signal handlers run while we wait.
+		gui = None
+		signal.alarm(0)
+		
+		if stopRequested:
+			log(f'gui {describe(status)}, stopping.')
+			return 0
+		
+		if restartRequested:
+			restartRequested = False
+			log(f'gui {describe(status)}, restarting as requested.')
+			continue
+		
+		if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+			log('gui exited, stopping.')
+			return 0
+		
+		log(f'gui {describe(status)}, restarting.')
+		time.sleep(max(0, MIN_RESTART_INTERVAL - (time.monotonic() - forkedAt)))
+
+
+if __name__ == '__main__':
+	sys.exit(main())
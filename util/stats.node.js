@@ -32,7 +32,7 @@ const server = http.createServer(function (req, res) {
 		let data = '';
 		req.on('data', function(dat) {
 			data += dat;
-			if(data.length > 2000) { 
+			if(data.length > 200000) { //Batches of 50 reports.
 				console.error('Request too long.')
 				req.abort()
 				res.writeHead(403, {"Content-Type": "text"});
@@ -41,12 +41,15 @@ const server = http.createServer(function (req, res) {
 		});
 		req.on('end', function() {
 			console.log('got', data)
-			let fields = JSON.parse(data);
-			if(!fields.tag) { console.error('missing tag'); }
-			if(!fields.serial_number) { console.error('missing serial_number'); }
-			
-			fields.timestamp =  (new Date()).toUTCString();
-			fs.appendFileSync(`${output_folder}/${fields.tag}.jsonl`, JSON.stringify(fields)+'\n');
+			let reports = JSON.parse(data);
+			if(!Array.isArray(reports)) { reports = [reports]; } //Older cameras send one report at a time.
+			for(let fields of reports) {
+				if(!fields.tag) { console.error('missing tag'); }
+				if(!fields.serial_number) { console.error('missing serial_number'); }
+				
+				fields.timestamp = fields.timestamp || (new Date()).toUTCString(); //Reports are batched, so the camera says when they happened.
+				fs.appendFileSync(`${output_folder}/${fields.tag}.jsonl`, JSON.stringify(fields)+'\n');
+			}
 			res.writeHead(200, {"Content-Type": "text"});
 			res.end('ok');
 		});
@@ -22,7 +22,7 @@ bash <<< "#sh doesn't do the equality test for 143, must use bash
 	
 	while true; do
 		sleep 2 &
-		PYTHONPATH="." python3 chronosGui2/__main__.py --pdb $@ < `readlink -f /dev/stdin` 2> `readlink -f /dev/stderr`
+		PYTHONPATH="." python3 chronosGui2/zygote.py --pdb $@ < `readlink -f /dev/stdin` 2> `readlink -f /dev/stderr` #The zygote restarts the gui itself when it's killed below, without reimporting Qt.
 		PY_EXIT=\$?
 		[[ \$PY_EXIT -eq 137 ]] || echo Python exited with code \$PY_EXIT. Waiting… #Python exits with 137 when killed by watchdog running pkill. We don't really care about that, since it's so frequent, but knowing when it's died of other causes is useful.
 		wait #In combination with sleep 2, don't restart the python script until at least two seconds have passed since the last invocation. This stops python from running many times if python crashes immediately.
@@ -43,11 +43,11 @@ timeout = 0.05 #seconds
 killingProcess = None
 
 def callback(evt):
-	"""Terminate running python in this session, so the bash loop above restarts it."""
+	"""Terminate the running gui in this session, so the zygote started by the bash loop above restarts it."""
 	global killingProcess
 	killingProcess and killingProcess.kill()
 	# SIGKILL is needed only on the camera, as pdb() does not respond to SIGTERM only on the camera.
-	killingProcess = subprocess.Popen(f"sleep {timeout} && pkill --signal SIGKILL --parent {sys.argv[1]} --full chronosGui2/__main__.py", shell=True)
+	killingProcess = subprocess.Popen(f"sleep {timeout} && pkill --signal SIGKILL --parent $(pgrep --parent {sys.argv[1]} --full chronosGui2/zygote.py) --full chronosGui2/zygote.py", shell=True)
 	
 event_handler = PatternMatchingEventHandler(
 	patterns=["*.py","*.ui","*.svg","*.png"],